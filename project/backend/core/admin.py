@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Organization, ThemeHistory, License
+from .models import User, Organization, ThemeBlob, ThemeHistory, License, Job
 
 
 @admin.register(User)
@@ -46,14 +46,37 @@ class OrganizationAdmin(admin.ModelAdmin):
 @admin.register(ThemeHistory)
 class ThemeHistoryAdmin(admin.ModelAdmin):
     list_display = ['organization', 'version', 'created_at']
+    list_select_related = ['organization']
     list_filter = ['created_at']
     search_fields = ['organization__name', 'version']
     readonly_fields = ['created_at']
 
 
+@admin.register(ThemeBlob)
+class ThemeBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'file', 'size', 'ref_count', 'created_at']
+
+
 @admin.register(License)
 class LicenseAdmin(admin.ModelAdmin):
     list_display = ['vm_ip', 'expiry_date', 'created_at']
     list_filter = ['expiry_date', 'created_at']
-    search_fields = ['vm_ip', 'license_key']
+    search_fields = ['vm_ip']
     readonly_fields = ['license_key', 'created_at', 'updated_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Exact vm_ip match so license_vm_ip_idx can serve it; the default
+        # icontains lookup wraps the column in UPPER() and scans the table.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(vm_ip=search_term), False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    readonly_fields = ['params', 'result', 'error', 'created_at', 'started_at', 'finished_at']
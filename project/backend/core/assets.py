@@ -0,0 +1,75 @@
+from PIL import Image
+from .metrics import STAGE_ASSET_VALIDATION, timed
+
+
+class AssetRule:
+    def __init__(self, label, max_bytes, max_dimensions=None, allowed_dimensions=None, formats=None):
+        self.label = label
+        self.max_bytes = max_bytes
+        self.max_dimensions = max_dimensions
+        self.allowed_dimensions = allowed_dimensions
+        self.formats = formats
+
+    def check(self, size, dimensions, image_format):
+        if size > self.max_bytes:
+            return self.size_error()
+
+        width, height = dimensions
+        if self.max_dimensions:
+            max_width, max_height = self.max_dimensions
+            if width > max_width or height > max_height:
+                return f"{self.label} dimensions must not exceed {max_width}x{max_height} pixels"
+
+        if self.allowed_dimensions and (width, height) not in self.allowed_dimensions:
+            sizes = ' or '.join(f'{w}x{h}' for w, h in self.allowed_dimensions)
+            return f"{self.label} must be either {sizes} pixels"
+
+        if self.formats and image_format not in self.formats:
+            return f"{self.label} must be in {' or '.join(self.formats)} format"
+
+        return None
+
+    def size_error(self):
+        return f"{self.label} file size must not exceed {self.max_bytes // 1024}KB"
+
+
+ASSET_RULES = {
+    'logo': AssetRule('Logo', 20 * 1024, max_dimensions=(150, 80)),
+    'favicon': AssetRule('Favicon', 5 * 1024, allowed_dimensions=[(16, 16), (32, 32)]),
+    'banner': AssetRule('Banner', 30 * 1024, max_dimensions=(1000, 500)),
+    'basket_image': AssetRule('Basket image', 10 * 1024, max_dimensions=(100, 100), formats=['PNG']),
+}
+
+
+def read_image_header(uploaded_file):
+    # Image.open only parses the header; pixel data is never decoded here.
+    uploaded_file.seek(0)
+    try:
+        with Image.open(uploaded_file) as img:
+            return img.size, img.format
+    finally:
+        uploaded_file.seek(0)
+
+
+def validate_assets(uploads):
+    # ``uploads`` maps asset field names to uploaded files; returns field -> error.
+    errors = {}
+    with timed(STAGE_ASSET_VALIDATION):
+        for field_name, uploaded_file in uploads.items():
+            rule = ASSET_RULES[field_name]
+
+            if uploaded_file.size > rule.max_bytes:
+                errors[field_name] = rule.size_error()
+                continue
+
+            try:
+                dimensions, image_format = read_image_header(uploaded_file)
+            except Exception as e:
+                errors[field_name] = f"Invalid image file: {str(e)}"
+                continue
+
+            error = rule.check(uploaded_file.size, dimensions, image_format)
+            if error:
+                errors[field_name] = error
+
+    return errors
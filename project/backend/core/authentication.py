@@ -0,0 +1,104 @@
+import time
+import threading
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import User
+
+# Profile claims added to every access token for clients to read. The API
+# itself never trusts them for access decisions: request.user always comes
+# from UserCache, so deactivating or demoting a user applies within
+# JWT_USER_CACHE_TTL seconds rather than when the token expires.
+PROFILE_CLAIMS = ('username', 'email', 'is_super_admin')
+
+
+def user_profile(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'is_super_admin': user.is_super_admin,
+    }
+
+
+def add_profile_claims(token, user):
+    for claim in PROFILE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_profile_claims(super().get_token(user), user)
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        data['user'] = user_profile(self.user)
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    # Refresh is the one place claims are re-read from the database, so role
+    # and profile changes reach clients on their next refresh.
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.filter(pk=access[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User is inactive or deleted', code='user_inactive')
+        data['access'] = str(add_profile_claims(access, user))
+        return data
+
+
+class UserCache:
+    # Per-process TTL cache of User rows behind access tokens. Cleared for a
+    # user by the User post_save/post_delete signals in this process; other
+    # processes pick the change up once their entry expires.
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users = {}
+
+    def get(self, user_id):
+        entry = self._users.get(user_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        user = User.objects.filter(pk=user_id).first()
+        with self._lock:
+            if user is None:
+                self._users.pop(user_id, None)
+            else:
+                self._users[user_id] = (time.monotonic(), user)
+        return user
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+
+user_cache = UserCache(ttl=settings.JWT_USER_CACHE_TTL)
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    # Resolves the token's user through UserCache, so most requests need no
+    # user query while is_active and is_super_admin stay authoritative.
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
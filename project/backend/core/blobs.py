@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models import F
+from .models import Job, ThemeBlob
+from .storage import is_stored_file
+
+
+def theme_blob_name(sha256):
+    return f'{sha256[:2]}/{sha256}.zip'
+
+
+def acquire_theme_blob(content_file, sha256):
+    # Returns the blob for ``sha256`` with one more reference, writing
+    # ``content_file`` only when no stored copy of that package exists yet.
+    # The row lock serializes concurrent writers of the same package.
+    with transaction.atomic():
+        blob, created = ThemeBlob.objects.select_for_update().get_or_create(sha256=sha256)
+        if not blob.file or not is_stored_file(blob.file.storage, blob.file.name):
+            blob.file.save(theme_blob_name(sha256), content_file, save=False)
+            blob.size = blob.file.size
+        blob.ref_count = F('ref_count') + 1
+        blob.save()
+        blob.refresh_from_db()
+    return blob
+
+
+def release_theme_blob(blob_id):
+    # Drops one reference and removes the blob, and its file once the
+    # transaction commits, when nothing points at it any more.
+    with transaction.atomic():
+        blob = ThemeBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 0:
+            blob.ref_count -= 1
+            blob.save(update_fields=['ref_count'])
+        if blob.ref_count > 0 or blob.theme_history.exists():
+            return
+
+        storage, name = blob.file.storage, blob.file.name
+        blob.delete()
+        # Theme jobs hand out the package file itself as their result.
+        if name and not Job.objects.filter(result_file=name).exists():
+            transaction.on_commit(lambda: storage.delete(name))
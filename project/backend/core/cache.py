@@ -0,0 +1,145 @@
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+# Two cache tiers:
+#   local  - the "default" cache, in process memory, one per worker
+#   shared - the optional "shared" cache (Redis at REDIS_URL), seen by every
+#            worker on every node
+# Reads try local first and fill it from shared; writes go to both.
+#
+# Keys are namespaced and carry a generation counter per namespace and scope
+# (usually an organization id). Invalidating bumps the generation in the
+# shared tier instead of deleting keys; workers memoize the generation for
+# CACHE_GENERATION_TTL seconds, so that is how long another node may keep
+# serving the previous generation. Old entries simply expire.
+
+LOCAL_CACHE = 'default'
+SHARED_CACHE = 'shared'
+
+_MISSING = object()
+
+
+def local_cache():
+    return caches[LOCAL_CACHE]
+
+
+def shared_cache():
+    return caches[SHARED_CACHE] if SHARED_CACHE in settings.CACHES else None
+
+
+def _new_generation():
+    # Time-based, so a generation key that was evicted never comes back with a
+    # number that old entries were stored under.
+    return time.time_ns()
+
+
+class CacheNamespace:
+    def __init__(self, name, timeout_setting):
+        self.name = name
+        self.timeout_setting = timeout_setting
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting)
+
+    def _scope(self, scope):
+        return '*' if scope is None else scope
+
+    def _generation_key(self, scope):
+        return f'{self.name}:{self._scope(scope)}:generation'
+
+    def _key(self, key, scope, generation):
+        return f'{self.name}:{self._scope(scope)}:{generation}:{key}'
+
+    def generation(self, scope=None):
+        generation_key = self._generation_key(scope)
+        local, shared = local_cache(), shared_cache()
+
+        generation = local.get(generation_key)
+        if generation is not None:
+            return generation
+
+        if shared is None:
+            local.add(generation_key, _new_generation(), None)
+            return local.get(generation_key)
+
+        shared.add(generation_key, _new_generation(), None)
+        generation = shared.get(generation_key)
+        local.set(generation_key, generation, settings.CACHE_GENERATION_TTL)
+        return generation
+
+    def invalidate(self, scope=None):
+        generation_key = self._generation_key(scope)
+        local, shared = local_cache(), shared_cache()
+
+        if shared is None:
+            local.set(generation_key, _new_generation(), None)
+            return
+
+        shared.add(generation_key, _new_generation(), None)
+        try:
+            shared.incr(generation_key)
+        except ValueError:
+            # Evicted between add() and incr().
+            shared.set(generation_key, _new_generation(), None)
+        local.delete(generation_key)
+
+    def make_key(self, key, scope=None):
+        return self._key(key, scope, self.generation(scope))
+
+    def _get(self, cache_key, default=None):
+        local, shared = local_cache(), shared_cache()
+        value = local.get(cache_key, _MISSING)
+        if value is _MISSING and shared is not None:
+            value = shared.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                local.set(cache_key, value, self.timeout)
+        return default if value is _MISSING else value
+
+    def _set(self, cache_key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        local_cache().set(cache_key, value, timeout)
+        shared = shared_cache()
+        if shared is not None:
+            shared.set(cache_key, value, timeout)
+
+    def get(self, key, scope=None, default=None):
+        return self._get(self.make_key(key, scope), default)
+
+    def set(self, key, value, scope=None, timeout=None):
+        self._set(self.make_key(key, scope), value, timeout)
+
+    def get_or_set(self, key, default, scope=None, timeout=None):
+        # The key is taken before ``default`` runs, so a value computed while
+        # the scope is invalidated lands in the old generation.
+        cache_key = self.make_key(key, scope)
+        value = self._get(cache_key, _MISSING)
+        if value is _MISSING:
+            value = default()
+            self._set(cache_key, value, timeout)
+        return value
+
+    async def aget_or_set(self, key, default, scope=None, timeout=None):
+        # ``default`` is a coroutine function. A hit with the generation
+        # memoized locally never leaves the event loop.
+        generation = local_cache().get(self._generation_key(scope))
+        if generation is None:
+            cache_key = await sync_to_async(self.make_key, thread_sensitive=False)(key, scope)
+        else:
+            cache_key = self._key(key, scope, generation)
+
+        value = local_cache().get(cache_key, _MISSING)
+        if value is _MISSING and shared_cache() is not None:
+            value = await sync_to_async(self._get, thread_sensitive=False)(cache_key, _MISSING)
+        if value is _MISSING:
+            value = await default()
+            await sync_to_async(self._set, thread_sensitive=False)(cache_key, value, timeout)
+        return value
+
+
+organization_cache = CacheNamespace('organization', 'ORGANIZATION_CACHE_TTL')
+theme_package_cache = CacheNamespace('theme_package', 'THEME_PACKAGE_CACHE_TTL')
+dashboard_stats_cache = CacheNamespace('dashboard_stats', 'DASHBOARD_STATS_CACHE_TTL')
+master_key_cache = CacheNamespace('master_key', 'MASTER_KEY_CACHE_TTL')
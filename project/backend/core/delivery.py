@@ -0,0 +1,133 @@
+import zipfile
+import mimetypes
+from functools import partial
+from io import BytesIO
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from .cache import theme_package_cache
+from .executors import arun_cpu
+from .http import conditional_response, require_safe_async, strong_etag
+from .models import ThemeHistory
+from .storage import read_storage_file
+from .themes import ensure_package_hash
+
+# Public, unauthenticated delivery of generated theme packages. Everything is
+# read out of the ThemeHistory zip, so a versioned URL always returns the same
+# bytes and can be cached forever by browsers and CDNs. The views are async:
+# under ASGI a local cache hit never leaves the event loop, and misses only
+# borrow a thread for the query, the storage read and the unzip.
+
+VERSION_LENGTH = 16
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def theme_version(theme_history):
+    return ensure_package_hash(theme_history)[:VERSION_LENGTH]
+
+
+def _latest_theme_history(organization_id):
+    theme_history = (
+        ThemeHistory.objects
+        .filter(organization_id=organization_id)
+        .exclude(zip_file='')
+        .order_by('-created_at', '-id')
+        .first()
+    )
+    if theme_history is None or not theme_version(theme_history):
+        raise Http404('No theme package has been generated')
+    return theme_history
+
+
+def _latest_version(organization_id):
+    return theme_version(_latest_theme_history(organization_id))
+
+
+def _find_theme_history(organization_id, version):
+    return (
+        ThemeHistory.objects
+        .filter(organization_id=organization_id, package_hash__startswith=version)
+        .order_by('-created_at', '-id')
+        .first()
+    )
+
+
+def _read_member(package, member):
+    with zipfile.ZipFile(BytesIO(package)) as archive:
+        return archive.read(member)
+
+
+async def _read_delivery_member(organization_id, version, member):
+    theme_history = await sync_to_async(_find_theme_history)(organization_id, version)
+    if theme_history is None:
+        raise Http404('Unknown theme version')
+
+    try:
+        package = await sync_to_async(read_storage_file, thread_sensitive=False)(theme_history.zip_file)
+        data = await arun_cpu(_read_member, package, member)
+    except (KeyError, OSError, zipfile.BadZipFile):
+        raise Http404('File not found')
+
+    content_type = mimetypes.guess_type(member)[0] or 'application/octet-stream'
+    etag = strong_etag(f'{theme_history.package_hash}:{member}')
+    return data, content_type, etag, theme_history.created_at
+
+
+async def _load_member(organization_id, version, member):
+    # Keys include the version, so entries never go stale and are not scoped
+    # to the organization's generation. A miss raises Http404 and is not cached.
+    return await theme_package_cache.aget_or_set(
+        f'delivery:{organization_id}:{version}:{member}',
+        partial(_read_delivery_member, organization_id, version, member)
+    )
+
+
+async def _delivery_response(request, organization_id, version, member, **cache_control):
+    data, content_type, etag, last_modified = await _load_member(int(organization_id), version, member)
+    response = HttpResponse(data, content_type=content_type)
+    response['X-Theme-Version'] = version
+    response['Access-Control-Allow-Origin'] = '*'
+    return conditional_response(request, response, etag, last_modified, **cache_control)
+
+
+@require_safe_async
+async def latest_config(request, organization_id):
+    # Unversioned entry point: short-lived, and points at the immutable URL.
+    version = await theme_package_cache.aget_or_set(
+        'latest_version',
+        partial(sync_to_async(_latest_version), organization_id),
+        scope=organization_id
+    )
+    response = await _delivery_response(
+        request,
+        organization_id,
+        version,
+        'config.json',
+        public=True,
+        max_age=settings.THEME_DELIVERY_LATEST_MAX_AGE
+    )
+    response['Content-Location'] = reverse('theme-delivery-config', args=[organization_id, version])
+    return response
+
+
+@require_safe_async
+async def versioned_config(request, organization_id, version):
+    return await _versioned_member(request, organization_id, version, 'config.json')
+
+
+@require_safe_async
+async def versioned_asset(request, organization_id, version, path):
+    return await _versioned_member(request, organization_id, version, f'assets/{path}')
+
+
+async def _versioned_member(request, organization_id, version, member):
+    return await _delivery_response(
+        request,
+        organization_id,
+        version,
+        member,
+        public=True,
+        max_age=IMMUTABLE_MAX_AGE,
+        immutable=True
+    )
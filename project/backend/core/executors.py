@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# One pool per process for CPU-bound work (zip compression, RSA signing).
+# It keeps that work off the event loop under ASGI, lets zlib (which releases
+# the GIL) use several cores, and caps how much CPU work a worker process runs
+# at once (CPU_EXECUTOR_WORKERS) no matter how many requests are in flight.
+
+_cpu_executor = None
+_cpu_executor_lock = threading.Lock()
+
+
+def cpu_executor():
+    global _cpu_executor
+    if _cpu_executor is None:
+        with _cpu_executor_lock:
+            if _cpu_executor is None:
+                _cpu_executor = ThreadPoolExecutor(
+                    max_workers=settings.CPU_EXECUTOR_WORKERS,
+                    thread_name_prefix='cpu'
+                )
+    return _cpu_executor
+
+
+def run_cpu(func, *args, **kwargs):
+    # Only for leaf functions that touch neither the database nor the pool itself.
+    if threading.current_thread().name.startswith('cpu_'):
+        return func(*args, **kwargs)
+    return cpu_executor().submit(func, *args, **kwargs).result()
+
+
+async def arun_cpu(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def aiterate(iterable, thread_sensitive=True):
+    # Drives a blocking iterator from the event loop one item at a time, so
+    # ASGI responses stream instead of Django collecting them into a list.
+    # Iterators that use the ORM must stay thread-sensitive.
+    iterator = iter(iterable)
+    sentinel = object()
+    next_item = sync_to_async(next, thread_sensitive=thread_sensitive)
+    try:
+        while True:
+            item = await next_item(iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=thread_sensitive)()
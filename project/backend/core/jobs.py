@@ -0,0 +1,109 @@
+import logging
+import secrets
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Job, Organization
+from .licenses import build_license_package, license_package_filename
+from .themes import get_or_create_theme_package, theme_package_filename
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+@job_handler(Job.KIND_THEME)
+def run_theme_job(job):
+    organization = Organization.objects.get(pk=job.params['organization'])
+    theme_history, content, created = get_or_create_theme_package(organization)
+
+    # The ThemeHistory package is the artifact; point at it instead of copying it.
+    job.result_file = theme_history.zip_file.name
+    return {
+        'theme_history_id': theme_history.id,
+        'cached': not created,
+        'filename': theme_package_filename(organization),
+    }
+
+
+@job_handler(Job.KIND_LICENSE)
+def run_license_job(job):
+    vm_ip = job.params['vm_ip']
+    expiry_date = job.params['expiry_date']
+    license_obj, content = build_license_package(vm_ip, expiry_date)
+
+    filename = license_package_filename(vm_ip, expiry_date)
+    # Signed licenses get an unguessable directory and are only served through
+    # /api/jobs/{id}/result/ (serve_media refuses job results).
+    job.result_file.save(f'{secrets.token_urlsafe(24)}/{filename}', ContentFile(content), save=False)
+    return {
+        'license_id': license_obj.id,
+        'filename': filename,
+    }
+
+
+def enqueue_job(kind, params, user=None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+
+    return Job.objects.create(
+        kind=kind,
+        params=params,
+        created_by_id=getattr(user, 'pk', None)
+    )
+
+
+def claim_next_job():
+    with transaction.atomic():
+        queryset = Job.objects.filter(status=Job.STATUS_PENDING).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+
+        job = queryset.first()
+        if not job:
+            return None
+
+        # Guard against another worker claiming the row on backends without row locks.
+        claimed = Job.objects.filter(pk=job.pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            started_at=timezone.now()
+        )
+        if not claimed:
+            return None
+
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = Job.STATUS_SUCCEEDED
+    except Organization.DoesNotExist:
+        logger.warning('Job failed: organization not found', extra={'job': job.pk, 'kind': job.kind})
+        job.status = Job.STATUS_FAILED
+        job.error = 'Organization not found'
+    except Exception:
+        # The traceback goes to the worker log only; Job.error is shown to
+        # API clients.
+        logger.exception('Job failed', extra={'job': job.pk, 'kind': job.kind})
+        job.status = Job.STATUS_FAILED
+        job.error = f'Job failed with an internal error; see the worker log for job {job.pk}'
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'result_file', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    return Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        started_at__lt=timezone.now() - older_than
+    ).update(status=Job.STATUS_PENDING, started_at=None)
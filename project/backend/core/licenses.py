@@ -0,0 +1,266 @@
+import json
+import time
+import zipfile
+import hashlib
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from datetime import datetime
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.backends import default_backend
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .models import License, MasterKey
+from .cache import master_key_cache
+from .executors import run_cpu
+from .signing import sign_license_chunk, sign_license_payload
+from .verification import LicenseVerifier
+from .metrics import STAGE_LICENSE_BATCH_SIGNING, STAGE_LICENSE_SIGNING, timed
+
+logger = logging.getLogger(__name__)
+
+_master_key_lock = threading.Lock()
+
+
+def get_signing_key_row():
+    return MasterKey.objects.filter(singleton=True).first()
+
+
+def get_or_create_master_key():
+    master_key = get_signing_key_row()
+    if master_key:
+        return master_key
+
+    with _master_key_lock:
+        master_key = get_signing_key_row()
+        if master_key:
+            return master_key
+
+        private_key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+            backend=default_backend()
+        )
+        public_key = private_key.public_key()
+
+        private_key_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ).decode()
+
+        public_key_pem = public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+
+        # master_key_singleton allows one signing key. A process that loses
+        # the race blocks on the winner's insert, gets IntegrityError once it
+        # commits and uses the winner's key; its own key never exists.
+        try:
+            with transaction.atomic():
+                return MasterKey.objects.create(
+                    private_key_pem=private_key_pem,
+                    public_key_pem=public_key_pem
+                )
+        except IntegrityError:
+            return MasterKey.objects.get(singleton=True)
+
+
+class LoadedMasterKey:
+    def __init__(self, master_key):
+        self.id = master_key.pk
+        self.public_key_pem = master_key.public_key_pem
+        self.private_key = serialization.load_pem_private_key(
+            master_key.private_key_pem.encode(),
+            password=None,
+            backend=default_backend()
+        )
+        self.verifier = LicenseVerifier(self.public_key_pem)
+
+
+class MasterKeyProvider:
+    # Parses the master key once per process. Parsed keys can't be pickled (and
+    # the private key should not sit in Redis), so only the master_key cache
+    # generation is shared: MasterKey signals bump it and every worker reloads
+    # once it sees the new generation. The key is also re-checked against the
+    # database every ``ttl`` seconds.
+    def __init__(self, ttl):
+        self.ttl = ttl
+        # Re-entrant: creating a key fires the MasterKey post_save signal,
+        # which calls invalidate().
+        self._lock = threading.RLock()
+        self._key = None
+        self._generation = None
+        self._checked_at = 0
+
+    def _is_fresh(self, generation):
+        return (
+            self._key is not None
+            and self._generation == generation
+            and time.monotonic() - self._checked_at < self.ttl
+        )
+
+    def get(self):
+        generation = master_key_cache.generation()
+        key = self._key
+        if key is not None and self._is_fresh(generation):
+            return key
+
+        with self._lock:
+            if self._is_fresh(generation):
+                return self._key
+
+            current_id = MasterKey.objects.filter(singleton=True).values_list('id', flat=True).first()
+            if self._key is None or self._key.id != current_id:
+                self._key = LoadedMasterKey(get_or_create_master_key())
+            self._generation = generation
+            self._checked_at = time.monotonic()
+            return self._key
+
+    def invalidate(self):
+        master_key_cache.invalidate()
+        with self._lock:
+            self._key = None
+
+
+master_key_provider = MasterKeyProvider(ttl=settings.MASTER_KEY_CACHE_TTL)
+
+
+def parse_license_request(vm_ip, expiry_date):
+    if not vm_ip or not expiry_date:
+        raise ValueError('vm_ip and expiry_date are required')
+    if not isinstance(vm_ip, str) or not isinstance(expiry_date, str):
+        raise ValueError('vm_ip and expiry_date must be strings')
+
+    try:
+        return datetime.strptime(expiry_date, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+
+def license_package_filename(vm_ip, expiry_date):
+    return f"license_{vm_ip.replace('.', '_')}_{expiry_date}.zip"
+
+
+def build_license_package(vm_ip, expiry_date):
+    expiry_date_obj = parse_license_request(vm_ip, expiry_date)
+
+    signing_key = master_key_provider.get()
+    with timed(STAGE_LICENSE_SIGNING):
+        payload_string, signature_hex = run_cpu(sign_license_payload, signing_key.private_key, vm_ip, expiry_date)
+
+    license_key = hashlib.sha256(payload_string.encode()).hexdigest()
+
+    license_obj = License.objects.create(
+        vm_ip=vm_ip,
+        expiry_date=expiry_date_obj,
+        license_key=license_key
+    )
+
+    license_json = {
+        "vm_id": vm_ip,
+        "expiry": expiry_date,
+        "signature": signature_hex
+    }
+
+    public_key_pem = signing_key.public_key_pem
+
+    zip_buffer = BytesIO()
+    zip_file = zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED)
+    zip_file.writestr('license.json', json.dumps(license_json, indent=2))
+    zip_file.writestr('public_key.pem', public_key_pem)
+    zip_file.close()
+
+    return license_obj, zip_buffer.getvalue()
+
+
+_signing_pool = None
+_signing_pool_lock = threading.Lock()
+
+
+def _get_signing_pool():
+    # One long-lived pool per web process. forkserver/spawn children start
+    # clean instead of forking a threaded server process (and whatever locks
+    # its other threads hold), and never import Django.
+    global _signing_pool
+    if _signing_pool is None:
+        with _signing_pool_lock:
+            if _signing_pool is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _signing_pool = ProcessPoolExecutor(
+                    max_workers=settings.LICENSE_SIGNING_WORKERS,
+                    mp_context=multiprocessing.get_context(method)
+                )
+    return _signing_pool
+
+
+def _reset_signing_pool(pool):
+    global _signing_pool
+    with _signing_pool_lock:
+        if _signing_pool is pool:
+            _signing_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def sign_license_batch(signing_key, entries, workers):
+    # RSA-PSS signing is CPU-bound, so large batches are split into chunks for
+    # the signing pool's worker processes.
+    if workers <= 1 or len(entries) < settings.LICENSE_BATCH_PARALLEL_THRESHOLD:
+        return [sign_license_payload(signing_key.private_key, *entry) for entry in entries]
+
+    private_key_pem = signing_key.private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    size = max(1, -(-len(entries) // (workers * 4)))
+    chunks = [entries[index:index + size] for index in range(0, len(entries), size)]
+
+    pool = _get_signing_pool()
+    try:
+        signed = pool.map(sign_license_chunk, [private_key_pem] * len(chunks), chunks)
+        return [result for chunk in signed for result in chunk]
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and sign this batch here.
+        logger.exception('License signing pool failed, signing in process')
+        _reset_signing_pool(pool)
+        return [sign_license_payload(signing_key.private_key, *entry) for entry in entries]
+
+
+def license_json_filename(vm_ip, expiry_date):
+    return f"license_{vm_ip.replace('.', '_')}_{expiry_date}.json"
+
+
+def build_license_batch_package(entries):
+    # ``entries`` is a list of already validated ``(vm_ip, expiry_date)`` pairs.
+    signing_key = master_key_provider.get()
+    with timed(STAGE_LICENSE_BATCH_SIGNING):
+        signed = sign_license_batch(signing_key, entries, settings.LICENSE_SIGNING_WORKERS)
+
+    licenses = []
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for (vm_ip, expiry_date), (payload_string, signature_hex) in zip(entries, signed):
+            licenses.append(License(
+                vm_ip=vm_ip,
+                expiry_date=parse_license_request(vm_ip, expiry_date),
+                license_key=hashlib.sha256(payload_string.encode()).hexdigest()
+            ))
+
+            license_json = {
+                "vm_id": vm_ip,
+                "expiry": expiry_date,
+                "signature": signature_hex
+            }
+            zip_file.writestr(license_json_filename(vm_ip, expiry_date), json.dumps(license_json, indent=2))
+
+        zip_file.writestr('public_key.pem', signing_key.public_key_pem)
+
+    License.objects.bulk_create(licenses)
+
+    return licenses, zip_buffer.getvalue()
@@ -0,0 +1,338 @@
+import io
+import json
+import random
+import shutil
+import platform
+import tempfile
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import django
+from PIL import Image
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.licenses import sign_license_payload
+from core.cache import local_cache
+from core.models import Organization, ThemeBlob, ThemeHistory, User
+from core.themes import (
+    build_theme_config,
+    build_theme_package,
+    get_or_create_theme_package,
+    hash_theme_assets,
+    theme_package_version,
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+# (field, size, format, extension) of the seeded assets; sizes match typical uploads.
+SEED_ASSETS = [
+    ('logo', (400, 200), 'PNG', 'png'),
+    ('favicon', (32, 32), 'PNG', 'png'),
+    ('banner', (1200, 400), 'JPEG', 'jpg'),
+    ('basket_image', (200, 200), 'PNG', 'png'),
+]
+
+SCENARIOS = [
+    'organization_list',
+    'organization_retrieve',
+    'generate_theme',
+    'generate_theme_cold',
+    'license_generate',
+    'dashboard_stats',
+]
+
+# SQLite allows one writer at a time; concurrent clients in these scenarios
+# would measure lock timeouts, so they always run with a single client there.
+WRITE_SCENARIOS = {'generate_theme', 'generate_theme_cold', 'license_generate'}
+
+
+def _image(size, image_format, seed):
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    # A little noise so compression behaves like a real image, not a flat fill.
+    for _ in range(size[0] * size[1] // 50):
+        img.putpixel(
+            (rng.randrange(size[0]), rng.randrange(size[1])),
+            (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        )
+    buffer = io.BytesIO()
+    img.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def summarize(durations, elapsed, errors):
+    ordered = sorted(durations)
+    result = {
+        'requests': len(ordered),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 4),
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+    }
+    if ordered:
+        result.update({
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+            'min_ms': round(ordered[0] * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+        })
+        for percentile in PERCENTILES:
+            index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+            result[f'p{percentile}_ms'] = round(ordered[index] * 1000, 3)
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database and benchmark the core API and hot code paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=50, help='Organizations to seed')
+        parser.add_argument('--history', type=int, default=5, help='Theme history rows per organization')
+        parser.add_argument('--requests', type=int, default=100, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per scenario')
+        parser.add_argument('--iterations', type=int, default=200, help='Iterations per micro-benchmark')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Run only these scenarios')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for data and request order')
+        parser.add_argument('--output', default='benchmark-results.json', help="JSON results path ('-' for stdout)")
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database if it exists')
+        parser.add_argument(
+            '--noinput', '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='Replace an existing test database without asking'
+        )
+
+    def handle(self, *args, **options):
+        if options['organizations'] < 1 or options['history'] < 1 or options['requests'] < 1:
+            raise CommandError('--organizations, --history and --requests must be at least 1')
+
+        self.rng = random.Random(options['seed'])
+        media_root = tempfile.mkdtemp(prefix='benchmark-media-')
+        old_name = connection.creation.create_test_db(
+            verbosity=max(options['verbosity'] - 1, 0),
+            autoclobber=not options['interactive'],
+            serialize=False,
+            keepdb=options['keepdb']
+        )
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ASSET_VARIANTS_ASYNC=False,
+                # Local tier only: shared entries keyed by real ids must not
+                # leak into (or out of) the throwaway database.
+                CACHES={'default': settings.CACHES['default']}
+            ):
+                local_cache().clear()
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=max(options['verbosity'] - 1, 0),
+                keepdb=options['keepdb']
+            )
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        payload = json.dumps(results, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(payload)
+        else:
+            with open(options['output'], 'w') as output:
+                output.write(payload + '\n')
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def run(self, options):
+        started = time.perf_counter()
+        user, organization_ids = self.seed(options)
+        seed_seconds = time.perf_counter() - started
+
+        results = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'platform': platform.platform(),
+                'options': {
+                    key: options[key] for key in (
+                        'organizations', 'history', 'requests', 'warmup', 'concurrency', 'iterations', 'seed'
+                    )
+                },
+                'seed_s': round(seed_seconds, 3),
+            },
+            'scenarios': {},
+            'micro': {},
+        }
+
+        token = APIClient().post(
+            '/api/auth/login/',
+            {'username': user.username, 'password': self.password},
+            format='json'
+        ).data['access']
+
+        for name in options['scenario'] or SCENARIOS:
+            results['scenarios'][name] = self.run_scenario(name, token, organization_ids, options)
+            self.report(name, results['scenarios'][name])
+
+        results['micro']['theme_zip_build'] = self.bench_zip_build(organization_ids, options['iterations'])
+        self.report('micro: theme_zip_build', results['micro']['theme_zip_build'])
+        results['micro']['license_pss_sign'] = self.bench_signing(options['iterations'])
+        self.report('micro: license_pss_sign', results['micro']['license_pss_sign'])
+        return results
+
+    def seed(self, options):
+        self.password = 'benchmark-password'
+        user = User.objects.create_user(
+            'benchmark-admin',
+            'benchmark@example.com',
+            self.password,
+            is_super_admin=True
+        )
+
+        organization_ids = []
+        for index in range(options['organizations']):
+            organization = Organization(
+                name=f'Benchmark Org {index}',
+                app_title=f'Benchmark App {index}',
+                primary_color=f'#{self.rng.randrange(0x1000000):06X}'
+            )
+            for field_name, size, image_format, extension in SEED_ASSETS:
+                getattr(organization, field_name).save(
+                    f'{field_name}_{index}.{extension}',
+                    ContentFile(_image(size, image_format, seed=f"{options['seed']}:{index}:{field_name}")),
+                    save=False
+                )
+            organization.save()
+            organization_ids.append(organization.pk)
+
+            # One real package, then M-1 older rows sharing its blob.
+            theme_history, content, created = get_or_create_theme_package(organization)
+            now = timezone.now()
+            ThemeHistory.objects.bulk_create([
+                ThemeHistory(
+                    organization=organization,
+                    blob=theme_history.blob,
+                    zip_file=theme_history.zip_file.name,
+                    version=theme_history.version,
+                    content_hash=theme_history.content_hash,
+                    package_hash=theme_history.package_hash,
+                    manifest=theme_history.manifest,
+                    created_at=now - timedelta(days=age)
+                )
+                for age in range(1, options['history'])
+            ])
+            ThemeBlob.objects.filter(pk=theme_history.blob_id).update(ref_count=options['history'])
+
+        return user, organization_ids
+
+    def request_for(self, name, organization_ids):
+        organization_id = self.rng.choice(organization_ids)
+        if name == 'organization_list':
+            return 'get', '/api/organizations/', None, None
+        if name == 'organization_retrieve':
+            return 'get', f'/api/organizations/{organization_id}/', None, None
+        if name == 'generate_theme':
+            return 'post', f'/api/organizations/{organization_id}/generate_theme/', None, None
+        if name == 'generate_theme_cold':
+            # Change a color first (untimed) so the package must be rebuilt.
+            color = f'#{self.rng.randrange(0x1000000):06X}'
+
+            def prepare():
+                Organization.objects.filter(pk=organization_id).update(primary_color=color)
+            return 'post', f'/api/organizations/{organization_id}/generate_theme/', None, prepare
+        if name == 'license_generate':
+            vm_ip = f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(256)}'
+            expiry = (date.today() + timedelta(days=365)).isoformat()
+            return 'post', '/api/license/generate/', {'vm_ip': vm_ip, 'expiry_date': expiry}, None
+        if name == 'dashboard_stats':
+            return 'get', '/api/dashboard/stats/', None, None
+        raise CommandError(f'Unknown scenario {name}')
+
+    def run_scenario(self, name, token, organization_ids, options):
+        requests = [self.request_for(name, organization_ids) for _ in range(options['warmup'] + options['requests'])]
+        warmup, measured = requests[:options['warmup']], requests[options['warmup']:]
+
+        def run(batch, in_thread=False):
+            # Server errors are counted like any other failed response instead
+            # of aborting the run.
+            client = APIClient(raise_request_exception=False)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            durations, errors = [], 0
+            try:
+                for method, path, data, prepare in batch:
+                    if prepare:
+                        prepare()
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, data, format='json')
+                    if response.streaming:
+                        for chunk in response.streaming_content:
+                            pass
+                    durations.append(time.perf_counter() - started)
+                    if not 200 <= response.status_code < 300:
+                        errors += 1
+            finally:
+                # Worker threads open their own connections; don't leak them.
+                if in_thread:
+                    connections.close_all()
+            return durations, errors
+
+        run(warmup)
+
+        concurrency = options['concurrency']
+        if concurrency > 1 and name in WRITE_SCENARIOS and connection.vendor == 'sqlite':
+            self.stderr.write(f'{name}: SQLite serializes writes, running with one client')
+            concurrency = 1
+
+        workers = max(1, min(concurrency, len(measured)))
+        batches = [measured[index::workers] for index in range(workers)]
+        started = time.perf_counter()
+        if workers == 1:
+            outcomes = [run(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(lambda batch: run(batch, in_thread=True), batches))
+        elapsed = time.perf_counter() - started
+
+        durations = [duration for batch_durations, errors in outcomes for duration in batch_durations]
+        result = summarize(durations, elapsed, sum(errors for batch_durations, errors in outcomes))
+        result['concurrency'] = workers
+        return result
+
+    def bench_zip_build(self, organization_ids, iterations):
+        organization = Organization.objects.prefetch_related('asset_variants').get(pk=organization_ids[0])
+        assets = hash_theme_assets(organization)
+        version = theme_package_version(organization, build_theme_config(organization), assets)
+        build_theme_package(organization, build_theme_config(organization), assets, version)
+
+        durations = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            iteration_started = time.perf_counter()
+            build_theme_package(organization, build_theme_config(organization), assets, version)
+            durations.append(time.perf_counter() - iteration_started)
+        return summarize(durations, time.perf_counter() - started, 0)
+
+    def bench_signing(self, iterations):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        expiry = (date.today() + timedelta(days=365)).isoformat()
+
+        durations = []
+        started = time.perf_counter()
+        for index in range(iterations):
+            iteration_started = time.perf_counter()
+            sign_license_payload(private_key, f'10.0.{index // 256 % 256}.{index % 256}', expiry)
+            durations.append(time.perf_counter() - iteration_started)
+        return summarize(durations, time.perf_counter() - started, 0)
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<28} n={result['requests']:<5} err={result['errors']:<3} "
+            f"rps={result['throughput_rps']:<9} p50={result.get('p50_ms')}ms "
+            f"p95={result.get('p95_ms')}ms p99={result.get('p99_ms')}ms"
+        )
@@ -0,0 +1,42 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from core.licenses import sign_license_payload
+from core.verification import LicenseVerifier
+
+
+class Command(BaseCommand):
+    help = 'Measure license signature verifications per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help='Number of licenses to verify')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='Thread counts to compare')
+
+    def handle(self, *args, **options):
+        # Uses a throwaway key so the benchmark never touches the database.
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_key_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        verifier = LicenseVerifier(public_key_pem)
+
+        expiry = (date.today() + timedelta(days=365)).isoformat()
+        licenses = []
+        for i in range(options['count']):
+            vm_ip = f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'
+            payload_string, signature_hex = sign_license_payload(private_key, vm_ip, expiry)
+            licenses.append({'vm_id': vm_ip, 'expiry': expiry, 'signature': signature_hex})
+
+        for workers in options['workers']:
+            started = time.perf_counter()
+            results = verifier.verify_many(licenses, workers=workers)
+            elapsed = time.perf_counter() - started
+
+            assert all(result['valid'] for result in results)
+            self.stdout.write(
+                f'workers={workers} licenses={len(licenses)} '
+                f'elapsed={elapsed:.3f}s rate={len(licenses) / elapsed:.0f} verifications/s'
+            )
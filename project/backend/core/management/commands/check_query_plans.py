@@ -0,0 +1,135 @@
+import re
+from datetime import date, timedelta
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from core.models import Organization, ThemeHistory, License, Job, User
+from core.pagination import CreatedAtCursorPagination
+from core.views import LicenseViewSet, OrganizationViewSet, ThemeHistoryViewSet
+
+SQLITE_TABLE_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def admin_changelist_queryset(model, params):
+    # The filtered queryset the admin changelist builds for these GET params.
+    request = RequestFactory().get('/admin/', params)
+    request.user = User(is_active=True, is_staff=True, is_superuser=True)
+    changelist = admin.site._registry[model].get_changelist_instance(request)
+    return changelist.queryset
+
+
+def hot_queries(organization_id):
+    # The querysets the API views, the job worker and the admin build, not
+    # hand-written approximations of them.
+    today = date.today()
+    ordering = CreatedAtCursorPagination.ordering
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    return [
+        ('organization list', OrganizationViewSet.queryset.order_by(*ordering)[:page_size]),
+        ('active theme count', Organization.objects.filter(config_json__isnull=False).values('pk')),
+        ('latest theme for organization', ThemeHistory.objects.filter(
+            organization_id=organization_id
+        ).order_by('-created_at', '-id')[:1]),
+        ('organization theme history', ThemeHistory.objects.filter(
+            organization_id=organization_id
+        ).select_related('organization').order_by(*ordering)[:page_size]),
+        ('theme history list', ThemeHistoryViewSet.queryset.order_by(*ordering)[:page_size]),
+        ('license list', LicenseViewSet.queryset[:page_size]),
+        # Filters without the changelist ordering: that is the changelist's
+        # COUNT query, and an ordered plan can hide a full index scan.
+        ('admin license search', admin_changelist_queryset(License, {'q': '10.0.0.1'}).order_by()),
+        ('admin license expiry filter', admin_changelist_queryset(License, {
+            'expiry_date__gte': today.isoformat(),
+            'expiry_date__lt': (today + timedelta(days=1)).isoformat(),
+        }).order_by()),
+        ('next pending job', Job.objects.filter(status=Job.STATUS_PENDING).order_by('created_at', 'id')[:1]),
+    ]
+
+
+def sequential_scans(plan):
+    if connection.vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if connection.vendor == 'sqlite':
+        return SQLITE_TABLE_SCAN.findall(plan)
+    return []
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot core queries against seeded data and fail on sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=2000)
+        parser.add_argument('--history', type=int, default=5, help='Theme history rows per organization')
+        parser.add_argument('--licenses', type=int, default=10000)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **options):
+        # Seed inside a transaction that is always rolled back so the command
+        # is safe to point at any database.
+        failures = []
+        try:
+            with transaction.atomic():
+                organization_id = self.seed(options)
+                failures = self.check_plans(organization_id, options['verbose_plans'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Sequential scans in: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('No sequential scans in hot queries'))
+
+    def seed(self, options):
+        organizations = Organization.objects.bulk_create(
+            Organization(
+                name=f'Plan check {i}',
+                config_json={'version': '1.0.0'} if i % 3 == 0 else None
+            )
+            for i in range(options['organizations'])
+        )
+        ThemeHistory.objects.bulk_create(
+            ThemeHistory(organization=organization, zip_file=f'theme_packages/plan_{organization.pk}_{n}.zip')
+            for organization in organizations
+            for n in range(options['history'])
+        )
+        License.objects.bulk_create(
+            License(
+                vm_ip=f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+                expiry_date=date.today() + timedelta(days=i % 730),
+                license_key=f'{i:064x}'
+            )
+            for i in range(options['licenses'])
+        )
+        Job.objects.bulk_create(
+            Job(kind=Job.KIND_THEME, status=Job.STATUS_SUCCEEDED, params={})
+            for i in range(options['organizations'])
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            if connection.vendor == 'postgresql':
+                # Only report a seq scan when no index could serve the query at all.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        return organizations[len(organizations) // 2].pk if organizations else 0
+
+    def check_plans(self, organization_id, verbose):
+        failures = []
+        for name, queryset in hot_queries(organization_id):
+            plan = queryset.explain()
+            scans = sequential_scans(plan)
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FAIL {name}: sequential scan on {', '.join(scans)}"))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(f'ok   {name}')
+                if verbose:
+                    self.stdout.write(plan)
+        return failures
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core.assets import ASSET_RULES
+from core.models import Organization
+from core.variants import generate_asset_variants
+
+
+class Command(BaseCommand):
+    help = 'Render favicon, srcset and WebP/AVIF variants for existing organization assets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, action='append', help='Limit to these organization ids')
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.all()
+        if options['organization']:
+            organizations = organizations.filter(pk__in=options['organization'])
+
+        for organization in organizations.iterator():
+            count = 0
+            for field_name in ASSET_RULES:
+                count += len(generate_asset_variants(organization, field_name))
+            self.stdout.write(f'{organization}: {count} variant(s)')
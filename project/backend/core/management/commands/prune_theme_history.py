@@ -0,0 +1,59 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.retention import delete_orphaned_media, prune_theme_history
+
+
+class Command(BaseCommand):
+    help = 'Apply the theme history retention policy and delete orphaned media files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-last',
+            type=int,
+            default=settings.THEME_RETENTION_KEEP_LAST,
+            help='Packages to keep per organization regardless of age (0 disables)'
+        )
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=settings.THEME_RETENTION_DAYS,
+            help='Also keep every package newer than this many days (0 disables)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows or files deleted per batch')
+        parser.add_argument(
+            '--orphan-grace-hours',
+            type=int,
+            default=settings.MEDIA_ORPHAN_GRACE_HOURS,
+            help='Leave unreferenced files younger than this alone'
+        )
+        parser.add_argument('--skip-orphans', action='store_true', help='Do not look for orphaned files')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        if options['keep_last'] < 0 or options['max_age_days'] < 0:
+            raise CommandError('--keep-last and --max-age-days must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+
+        count = prune_theme_history(
+            options['keep_last'],
+            options['max_age_days'],
+            options['batch_size'],
+            dry_run=options['dry_run']
+        )
+        self.stdout.write(f'{verb} {count} theme history row(s)')
+
+        if options['skip_orphans']:
+            return
+
+        orphans = delete_orphaned_media(
+            timedelta(hours=options['orphan_grace_hours']),
+            options['batch_size'],
+            dry_run=options['dry_run']
+        )
+        for name in orphans:
+            self.stdout.write(f'  {name}')
+        self.stdout.write(f'{verb} {len(orphans)} orphaned file(s)')
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.jobs import claim_next_job, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued theme and license generation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after processing this many jobs')
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=3600,
+            help='Requeue running jobs whose worker has been silent for this many seconds'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        requeued = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s)')
+
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            job = run_job(job)
+            processed += 1
+            self.stdout.write(f'{job} ({job.finished_at - job.started_at})')
+
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
@@ -0,0 +1,50 @@
+import hashlib
+import posixpath
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.http import Http404
+from .http import require_safe_async, strong_etag
+from .models import Job
+from .storage import is_stored_file, iter_storage_chunks, serve_storage_file
+
+
+# Only downloadable through their authenticated API endpoints.
+PRIVATE_MEDIA_PREFIXES = (Job._meta.get_field('result_file').upload_to,)
+
+
+@lru_cache(maxsize=4096)
+def _hash_storage_file(name, size, modified_time):
+    # Keyed on size and mtime so a rewritten file is re-hashed.
+    content_hash = hashlib.sha256()
+    for chunk in iter_storage_chunks(default_storage, name):
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def storage_file_hash(name):
+    return _hash_storage_file(name, default_storage.size(name), default_storage.get_modified_time(name))
+
+
+def _serve_media(request, name):
+    if not is_stored_file(default_storage, name):
+        raise Http404('File not found')
+
+    return serve_storage_file(
+        request,
+        default_storage,
+        name,
+        etag=lambda: strong_etag(storage_file_hash(name)),
+        last_modified=default_storage.get_modified_time(name),
+        public=True,
+        no_cache=True
+    )
+
+
+@require_safe_async
+async def serve_media(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    if not name or name.startswith('..') or name.startswith(PRIVATE_MEDIA_PREFIXES):
+        raise Http404('File not found')
+    # No database access, so the storage calls need not share the request thread.
+    return await sync_to_async(_serve_media, thread_sensitive=False)(request, name)
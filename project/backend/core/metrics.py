@@ -0,0 +1,288 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+
+# Minimal in-process metrics registry rendered in the Prometheus text format.
+# Each worker process keeps its own numbers; scrape every worker (or run a
+# single process) to see the full picture.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_THEME_ZIP = 'theme_zip_build'
+STAGE_ASSET_VALIDATION = 'asset_validation'
+STAGE_LICENSE_SIGNING = 'license_signing'
+STAGE_LICENSE_BATCH_SIGNING = 'license_batch_signing'
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', _format_labels(self.labels + ('le',), key + (bound,)), bucket_count
+            yield f'{self.name}_bucket', _format_labels(self.labels + ('le',), key + ('+Inf',)), count
+            yield f'{self.name}_sum', _format_labels(self.labels, key), total
+            yield f'{self.name}_count', _format_labels(self.labels, key), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LABELS = ('method', 'route')
+
+request_duration = registry.register(Histogram(
+    'http_request_duration_seconds',
+    'Time until the response is returned, per route',
+    REQUEST_LABELS + ('status',)
+))
+request_db_queries = registry.register(Counter(
+    'http_request_db_queries_total',
+    'Database queries executed while handling requests',
+    REQUEST_LABELS
+))
+request_db_seconds = registry.register(Counter(
+    'http_request_db_seconds_total',
+    'Time spent in database queries while handling requests',
+    REQUEST_LABELS
+))
+request_bytes_in = registry.register(Counter(
+    'http_request_bytes_received_total',
+    'Request body bytes received',
+    REQUEST_LABELS
+))
+response_bytes_out = registry.register(Counter(
+    'http_response_bytes_sent_total',
+    'Response body bytes sent, including streamed bodies',
+    REQUEST_LABELS
+))
+stage_duration = registry.register(Histogram(
+    'stage_duration_seconds',
+    'Time spent in instrumented stages (zip building, image validation, RSA signing)',
+    ('stage',)
+))
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage=stage)
+
+
+def timed_iter(stage, iterable):
+    # Times only the work done producing items, not the consumer's share
+    # (for streaming responses that is the client reading the body).
+    elapsed = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        stage_duration.observe(elapsed, stage=stage)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# The request's timer travels in a context variable, which asgiref copies into
+# the threads that run sync code, so queries are counted whichever thread (or
+# connection) a view ends up using.
+_query_timer = ContextVar('query_timer', default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.count += 1
+        timer.seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def _install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unmatched'
+
+
+def _count_streamed(content, labels):
+    sent = 0
+    try:
+        for chunk in content:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        response_bytes_out.inc(sent, **labels)
+
+
+async def _acount_streamed(content, labels):
+    sent = 0
+    try:
+        async for chunk in content:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        response_bytes_out.inc(sent, **labels)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == settings.METRICS_PATH:
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        return self._record(request, response, time.perf_counter() - started, timer)
+
+    async def __acall__(self, request):
+        if request.path == settings.METRICS_PATH:
+            return await self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        return self._record(request, response, time.perf_counter() - started, timer)
+
+    def _record(self, request, response, elapsed, timer):
+        labels = {'method': request.method, 'route': _route(request)}
+        request_duration.observe(elapsed, status=str(response.status_code), **labels)
+        request_db_queries.inc(timer.count, **labels)
+        request_db_seconds.inc(timer.seconds, **labels)
+        request_bytes_in.inc(int(request.META.get('CONTENT_LENGTH') or 0), **labels)
+
+        if getattr(response, 'file_to_stream', None) is not None:
+            # Re-wrapping a FileResponse would lose the server's sendfile path.
+            response_bytes_out.inc(int(response.get('Content-Length') or 0), **labels)
+        elif response.streaming and response.is_async:
+            response.streaming_content = _acount_streamed(response.streaming_content, labels)
+        elif response.streaming:
+            response.streaming_content = _count_streamed(response.streaming_content, labels)
+        else:
+            response_bytes_out.inc(len(response.content), **labels)
+        return response
+
+
+@require_safe
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
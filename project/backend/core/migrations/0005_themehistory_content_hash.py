@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_masterkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='themehistory',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
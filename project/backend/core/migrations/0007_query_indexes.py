@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at', 'id'], name='job_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='license',
+            index=models.Index(fields=['-created_at', '-id'], name='license_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='license',
+            index=models.Index(fields=['vm_ip'], name='license_vm_ip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='license',
+            index=models.Index(fields=['expiry_date'], name='license_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['-created_at', '-id'], name='org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('config_json__isnull', False)), fields=['id'], name='org_active_theme_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='themehistory',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='theme_hist_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='themehistory',
+            index=models.Index(fields=['-created_at', '-id'], name='theme_hist_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='asset_optimization',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_organization_asset_optimization'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset', models.CharField(max_length=50)),
+                ('name', models.CharField(max_length=100)),
+                ('format', models.CharField(max_length=10)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file', models.FileField(upload_to='organizations/variants/')),
+                ('source_name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asset_variants', to='core.organization')),
+            ],
+            options={
+                'verbose_name': 'Asset Variant',
+                'verbose_name_plural': 'Asset Variants',
+                'db_table': 'asset_variants',
+                'ordering': ['asset', 'width', 'format', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:16
+
+import hashlib
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_existing_packages(apps, schema_editor):
+    # Point existing rows at shared blobs. Their files stay where they are;
+    # duplicates become orphans for prune_theme_history to remove.
+    ThemeHistory = apps.get_model('core', 'ThemeHistory')
+    ThemeBlob = apps.get_model('core', 'ThemeBlob')
+
+    for theme_history in ThemeHistory.objects.filter(blob__isnull=True).exclude(zip_file='').iterator():
+        zip_file = theme_history.zip_file
+        if not zip_file.storage.exists(zip_file.name):
+            continue
+
+        sha256 = theme_history.package_hash
+        if not sha256:
+            content_hash = hashlib.sha256()
+            with zip_file.open('rb') as package:
+                for chunk in package.chunks():
+                    content_hash.update(chunk)
+            sha256 = content_hash.hexdigest()
+
+        blob, created = ThemeBlob.objects.get_or_create(
+            sha256=sha256,
+            defaults={'file': zip_file.name, 'size': zip_file.size}
+        )
+        ThemeBlob.objects.filter(pk=blob.pk).update(ref_count=models.F('ref_count') + 1)
+        ThemeHistory.objects.filter(pk=theme_history.pk).update(
+            blob=blob,
+            package_hash=sha256,
+            zip_file=blob.file.name
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_themehistory_package_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThemeBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='theme_blobs/')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Theme Blob',
+                'verbose_name_plural': 'Theme Blobs',
+                'db_table': 'theme_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='themehistory',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='theme_history', to='core.themeblob'),
+        ),
+        migrations.RunPython(link_existing_packages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_themeblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='themehistory',
+            name='manifest',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-17 11:05
+
+from django.db import migrations, models
+
+
+def mark_signing_key(apps, schema_editor):
+    # The oldest key is the one that has been signing licenses.
+    MasterKey = apps.get_model('core', 'MasterKey')
+    oldest = MasterKey.objects.order_by('id').first()
+    if oldest:
+        MasterKey.objects.filter(pk=oldest.pk).update(singleton=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_themehistory_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='masterkey',
+            name='singleton',
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.RunPython(mark_signing_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='masterkey',
+            name='singleton',
+            field=models.BooleanField(default=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='masterkey',
+            constraint=models.UniqueConstraint(fields=('singleton',), name='master_key_singleton'),
+        ),
+    ]
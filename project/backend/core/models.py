@@ -49,6 +49,7 @@ class Organization(models.Model):
     )
 
     config_json = models.JSONField(blank=True, null=True)
+    asset_optimization = models.JSONField(default=dict, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -58,22 +59,87 @@ class Organization(models.Model):
         verbose_name = 'Organization'
         verbose_name_plural = 'Organizations'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='org_created_idx'),
+            models.Index(
+                fields=['id'],
+                name='org_active_theme_idx',
+                condition=models.Q(config_json__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class AssetVariant(models.Model):
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='asset_variants'
+    )
+    asset = models.CharField(max_length=50)
+    name = models.CharField(max_length=100)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to='organizations/variants/')
+    source_name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'asset_variants'
+        verbose_name = 'Asset Variant'
+        verbose_name_plural = 'Asset Variants'
+        ordering = ['asset', 'width', 'format', 'id']
+
+    @property
+    def filename(self):
+        return f"{self.name}.{self.format}"
+
+    def __str__(self):
+        return f"{self.organization_id} - {self.filename}"
+
+
+class ThemeBlob(models.Model):
+    # One stored package per distinct zip; ThemeHistory rows with identical
+    # bytes share it and ref_count tracks how many point at it.
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='theme_blobs/')
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'theme_blobs'
+        verbose_name = 'Theme Blob'
+        verbose_name_plural = 'Theme Blobs'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
 class ThemeHistory(models.Model):
     organization = models.ForeignKey(
         Organization,
         on_delete=models.CASCADE,
         related_name='theme_history'
     )
+    blob = models.ForeignKey(
+        ThemeBlob,
+        on_delete=models.PROTECT,
+        related_name='theme_history',
+        null=True,
+        blank=True
+    )
     zip_file = models.FileField(
         upload_to='theme_packages/',
         validators=[FileExtensionValidator(allowed_extensions=['zip'])]
     )
     version = models.CharField(max_length=50, default='1.0.0')
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    package_hash = models.CharField(max_length=64, blank=True, default='')
+    manifest = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -81,6 +147,10 @@ class ThemeHistory(models.Model):
         verbose_name = 'Theme History'
         verbose_name_plural = 'Theme Histories'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id'], name='theme_hist_org_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='theme_hist_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.organization.name} - v{self.version} - {self.created_at}"
@@ -89,12 +159,18 @@ class ThemeHistory(models.Model):
 class MasterKey(models.Model):
     private_key_pem = models.TextField()
     public_key_pem = models.TextField()
+    # True on the signing key, NULL on any left over from before the
+    # constraint; the unique constraint allows only one signing key.
+    singleton = models.BooleanField(null=True, default=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'master_keys'
         verbose_name = 'Master Key'
         verbose_name_plural = 'Master Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['singleton'], name='master_key_singleton'),
+        ]
 
     def __str__(self):
         return f"Master Key - Created: {self.created_at}"
@@ -112,6 +188,64 @@ class License(models.Model):
         verbose_name = 'License'
         verbose_name_plural = 'Licenses'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='license_created_idx'),
+            models.Index(fields=['vm_ip'], name='license_vm_ip_idx'),
+            models.Index(fields=['expiry_date'], name='license_expiry_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vm_ip} - Expires: {self.expiry_date}"
+
+
+class Job(models.Model):
+    KIND_THEME = 'theme'
+    KIND_LICENSE = 'license'
+    KIND_CHOICES = [
+        (KIND_THEME, 'Theme package'),
+        (KIND_LICENSE, 'License package'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    result_file = models.FileField(upload_to='job_results/', blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='job_pending_idx',
+                condition=models.Q(status='pending')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job #{self.pk} - {self.status}"
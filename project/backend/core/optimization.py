@@ -0,0 +1,95 @@
+from io import BytesIO
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+def optimization_requested(request):
+    # ``request`` is the Django HttpRequest; ?optimize= overrides the setting.
+    value = request.GET.get('optimize')
+    if value is None:
+        return settings.ASSET_OPTIMIZATION_ENABLED
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def recompress_png(img):
+    # Only candidates that decode to exactly the original pixels are kept.
+    candidates = []
+
+    buffer = BytesIO()
+    img.save(buffer, 'PNG', optimize=True)
+    candidates.append(buffer.getvalue())
+
+    if img.mode in ('RGB', 'L') and img.getcolors(256) is not None:
+        paletted = img.convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
+        if paletted.convert(img.mode).tobytes() == img.tobytes():
+            buffer = BytesIO()
+            paletted.save(buffer, 'PNG', optimize=True)
+            candidates.append(buffer.getvalue())
+
+    return min(candidates, key=len)
+
+
+def reencode_jpeg(img, max_bytes):
+    # Walk down the quality budget and stop at the first encoding that fits.
+    # The EXIF orientation is applied to the pixels first, since the
+    # re-encoded file carries no EXIF to rotate it by.
+    img = ImageOps.exif_transpose(img)
+    best = None
+    quality = settings.ASSET_JPEG_QUALITY_MAX
+    while quality >= settings.ASSET_JPEG_QUALITY_MIN:
+        buffer = BytesIO()
+        img.save(
+            buffer,
+            'JPEG',
+            quality=quality,
+            optimize=True,
+            progressive=True,
+            icc_profile=img.info.get('icc_profile')
+        )
+        encoded = buffer.getvalue()
+        if best is None or len(encoded) < len(best):
+            best = encoded
+        if len(encoded) <= max_bytes:
+            break
+        quality -= 5
+    return best
+
+
+def optimize_upload(uploaded_file, max_bytes):
+    # Returns ``(file, stats)``; the original file is returned untouched when
+    # no optimization makes it smaller.
+    uploaded_file.seek(0)
+    original = uploaded_file.read()
+    uploaded_file.seek(0)
+
+    optimized = None
+    method = None
+    try:
+        with Image.open(BytesIO(original)) as img:
+            if img.format == 'PNG':
+                img.load()
+                optimized = recompress_png(img)
+                method = 'png-lossless'
+            elif img.format == 'JPEG':
+                img.load()
+                optimized = reencode_jpeg(img, max_bytes)
+                method = 'jpeg-reencode'
+    except Exception:
+        # Leave undecodable files for validation to reject.
+        return uploaded_file, None
+
+    if optimized is None or len(optimized) >= len(original):
+        return uploaded_file, None
+
+    stats = {
+        'method': method,
+        'original_bytes': len(original),
+        'optimized_bytes': len(optimized),
+        'saved_bytes': len(original) - len(optimized),
+    }
+    optimized_file = SimpleUploadedFile(
+        uploaded_file.name,
+        optimized,
+        content_type=getattr(uploaded_file, 'content_type', None)
+    )
+    return optimized_file, stats
@@ -0,0 +1,107 @@
+import posixpath
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .models import AssetVariant, Job, Organization, ThemeBlob, ThemeHistory
+
+MEDIA_MODELS = (Organization, AssetVariant, ThemeHistory, ThemeBlob, Job)
+
+
+def prunable_theme_history(keep_last, max_age_days, now=None):
+    # A row survives if it is among the newest ``keep_last`` for its
+    # organization or younger than ``max_age_days`` (0 disables either rule).
+    # The latest package of every organization is always kept.
+    queryset = ThemeHistory.objects.annotate(
+        rank=Window(
+            RowNumber(),
+            partition_by=[F('organization_id')],
+            order_by=[F('created_at').desc(), F('id').desc()]
+        )
+    ).filter(rank__gt=max(keep_last, 1))
+
+    if max_age_days:
+        cutoff = (now or timezone.now()) - timedelta(days=max_age_days)
+        queryset = queryset.filter(created_at__lt=cutoff)
+
+    return queryset.order_by('created_at', 'id')
+
+
+def prune_theme_history(keep_last, max_age_days, batch_size, dry_run=False):
+    # Deletes in batches so each transaction stays short; the post_delete
+    # signal releases the rows' blobs.
+    if dry_run:
+        return prunable_theme_history(keep_last, max_age_days).count()
+
+    deleted = 0
+    while True:
+        ids = list(prunable_theme_history(keep_last, max_age_days).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            ThemeHistory.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def _file_fields():
+    for model in MEDIA_MODELS:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def managed_media_prefixes():
+    return sorted({
+        field.upload_to.rstrip('/') for model, field in _file_fields()
+        if isinstance(field.upload_to, str) and field.upload_to
+    })
+
+
+def referenced_media_names():
+    names = set()
+    for model, field in _file_fields():
+        names.update(
+            model.objects
+            .exclude(**{f'{field.name}__isnull': True})
+            .exclude(**{field.name: ''})
+            .values_list(field.name, flat=True)
+            .iterator()
+        )
+    return names
+
+
+def _walk_storage(storage, prefix):
+    try:
+        directories, files = storage.listdir(prefix)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for name in files:
+        yield posixpath.join(prefix, name)
+    for directory in directories:
+        yield from _walk_storage(storage, posixpath.join(prefix, directory))
+
+
+def find_orphaned_media(grace, storage=default_storage, now=None):
+    # Files under our upload_to directories that no row references. Files
+    # newer than ``grace`` are skipped: an upload is written before its row
+    # is committed.
+    referenced = referenced_media_names()
+    cutoff = (now or timezone.now()) - grace
+    for prefix in managed_media_prefixes():
+        for name in _walk_storage(storage, prefix):
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) >= cutoff:
+                continue
+            yield name
+
+
+def delete_orphaned_media(grace, batch_size, dry_run=False, storage=default_storage):
+    orphans = list(find_orphaned_media(grace, storage))
+    if not dry_run:
+        for start in range(0, len(orphans), batch_size):
+            for name in orphans[start:start + batch_size]:
+                storage.delete(name)
+    return orphans
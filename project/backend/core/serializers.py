@@ -1,6 +1,8 @@
+from django.urls import reverse
 from rest_framework import serializers
-from PIL import Image
-from .models import User, Organization, ThemeHistory, License
+from .models import User, Organization, ThemeHistory, License, Job
+from .assets import ASSET_RULES, validate_assets
+from .optimization import optimization_requested, optimize_upload
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,11 +12,28 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    # Accepts ``fields=[...]`` to restrict the serialized output to those names.
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    {'fields': f"Unknown field(s): {', '.join(sorted(unknown))}"}
+                )
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class OrganizationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     logo_url = serializers.SerializerMethodField()
     favicon_url = serializers.SerializerMethodField()
     banner_url = serializers.SerializerMethodField()
     basket_image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Organization
@@ -33,11 +52,13 @@ class OrganizationSerializer(serializers.ModelSerializer):
             'banner_url',
             'basket_image',
             'basket_image_url',
+            'variants',
             'config_json',
+            'asset_optimization',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'config_json']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'config_json', 'asset_optimization']
 
     def get_logo_url(self, obj):
         if obj.logo:
@@ -67,72 +88,66 @@ class OrganizationSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.basket_image.url)
         return None
 
-    def validate_logo(self, value):
-        if value:
-            if value.size > 20 * 1024:
-                raise serializers.ValidationError("Logo file size must not exceed 20KB")
-
-            try:
-                img = Image.open(value)
-                width, height = img.size
-                if width > 150 or height > 80:
-                    raise serializers.ValidationError("Logo dimensions must not exceed 150x80 pixels")
-            except Exception as e:
-                raise serializers.ValidationError(f"Invalid image file: {str(e)}")
-
-            value.seek(0)
-        return value
-
-    def validate_favicon(self, value):
-        if value:
-            if value.size > 5 * 1024:
-                raise serializers.ValidationError("Favicon file size must not exceed 5KB")
-
-            try:
-                img = Image.open(value)
-                width, height = img.size
-                if not ((width == 16 and height == 16) or (width == 32 and height == 32)):
-                    raise serializers.ValidationError("Favicon must be either 16x16 or 32x32 pixels")
-            except Exception as e:
-                raise serializers.ValidationError(f"Invalid image file: {str(e)}")
-
-            value.seek(0)
-        return value
-
-    def validate_banner(self, value):
-        if value:
-            if value.size > 30 * 1024:
-                raise serializers.ValidationError("Banner file size must not exceed 30KB")
-
-            try:
-                img = Image.open(value)
-                width, height = img.size
-                if width > 1000 or height > 500:
-                    raise serializers.ValidationError("Banner dimensions must not exceed 1000x500 pixels")
-            except Exception as e:
-                raise serializers.ValidationError(f"Invalid image file: {str(e)}")
-
-            value.seek(0)
-        return value
-
-    def validate_basket_image(self, value):
-        if value:
-            if value.size > 10 * 1024:
-                raise serializers.ValidationError("Basket image file size must not exceed 10KB")
-
-            try:
-                img = Image.open(value)
-                width, height = img.size
-                if width > 100 or height > 100:
-                    raise serializers.ValidationError("Basket image dimensions must not exceed 100x100 pixels")
-
-                if img.format != 'PNG':
-                    raise serializers.ValidationError("Basket image must be in PNG format")
-            except Exception as e:
-                raise serializers.ValidationError(f"Invalid image file: {str(e)}")
-
-            value.seek(0)
-        return value
+    def get_variants(self, obj):
+        request = self.context.get('request')
+        variants = {}
+        for variant in obj.asset_variants.all():
+            variants.setdefault(variant.asset, []).append({
+                'name': variant.name,
+                'format': variant.format,
+                'width': variant.width,
+                'height': variant.height,
+                'url': request.build_absolute_uri(variant.file.url) if request else None,
+            })
+        return variants
+
+    def to_internal_value(self, data):
+        # Optimization runs before field validation so size limits apply to
+        # the bytes that will actually be stored.
+        self._asset_optimization = {}
+        request = self.context.get('request')
+        if request is None or not optimization_requested(request):
+            return super().to_internal_value(data)
+
+        data = data.dict() if hasattr(data, 'dict') else dict(data)
+        for field_name, rule in ASSET_RULES.items():
+            uploaded_file = data.get(field_name)
+            if not hasattr(uploaded_file, 'read'):
+                continue
+            data[field_name], stats = optimize_upload(uploaded_file, rule.max_bytes)
+            if stats:
+                self._asset_optimization[field_name] = stats
+
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+
+        request = self.context.get('request')
+        errors = {
+            field_name: ASSET_RULES[field_name].size_error()
+            for field_name in getattr(request, 'oversized_uploads', {})
+            if field_name in ASSET_RULES
+        }
+
+        uploads = {
+            field_name: attrs[field_name]
+            for field_name in ASSET_RULES
+            if attrs.get(field_name) and field_name not in errors
+        }
+        errors.update(validate_assets(uploads))
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if uploads:
+            record = dict(self.instance.asset_optimization or {}) if self.instance else {}
+            for field_name in uploads:
+                record.pop(field_name, None)
+            record.update(getattr(self, '_asset_optimization', {}))
+            attrs['asset_optimization'] = record
+
+        return attrs
 
 
 class ThemeHistorySerializer(serializers.ModelSerializer):
@@ -172,3 +187,30 @@ class LicenseSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['id', 'license_key', 'created_at', 'updated_at']
+
+
+class JobSerializer(serializers.ModelSerializer):
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'status',
+            'params',
+            'result',
+            'result_url',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_result_url(self, obj):
+        if obj.status == Job.STATUS_SUCCEEDED and obj.result_file:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(reverse('job-result', args=[obj.pk]))
+        return None
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User, Organization, ThemeHistory, MasterKey, AssetVariant
+from .authentication import user_cache
+from .cache import dashboard_stats_cache, organization_cache, theme_package_cache
+from .licenses import master_key_provider
+from .blobs import release_theme_blob
+
+
+def _invalidate(namespace, scope=None):
+    # Again on commit, so nothing read from the old rows while the transaction
+    # was open (here or on another node) outlives it.
+    namespace.invalidate(scope)
+    transaction.on_commit(lambda: namespace.invalidate(scope))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=MasterKey)
+def invalidate_master_key(sender, **kwargs):
+    master_key_provider.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Organization)
+@receiver([post_save, post_delete], sender=ThemeHistory)
+def invalidate_dashboard_stats_cache(sender, **kwargs):
+    _invalidate(dashboard_stats_cache)
+
+
+# Storing the generated config doesn't change any asset.
+CONFIG_ONLY_FIELDS = frozenset({'config_json', 'updated_at'})
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_cache(sender, instance, update_fields=None, **kwargs):
+    if update_fields and update_fields <= CONFIG_ONLY_FIELDS:
+        return
+    _invalidate(organization_cache, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=AssetVariant)
+def invalidate_organization_variants(sender, instance, **kwargs):
+    _invalidate(organization_cache, instance.organization_id)
+
+
+@receiver([post_save, post_delete], sender=ThemeHistory)
+def invalidate_theme_package_cache(sender, instance, **kwargs):
+    _invalidate(theme_package_cache, instance.organization_id)
+
+
+@receiver(post_delete, sender=ThemeHistory)
+def release_theme_history_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_theme_blob(instance.blob_id)
@@ -0,0 +1,42 @@
+import json
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.backends import default_backend
+
+# License signing. Only depends on `cryptography`, so it can run in the
+# signing pool's worker processes without setting up Django.
+
+_worker_keys = {}
+
+
+def sign_license_payload(private_key, vm_ip, expiry_date):
+    payload = {
+        "vm_id": vm_ip,
+        "expiry": expiry_date
+    }
+
+    payload_string = json.dumps(payload, separators=(",", ":"))
+    signature = private_key.sign(
+        payload_string.encode(),
+        padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH
+        ),
+        hashes.SHA256()
+    )
+    return payload_string, signature.hex()
+
+
+def sign_license_chunk(private_key_pem, entries):
+    # Worker processes outlive master key rotations, so the key travels with
+    # every task and is parsed once per process and key.
+    private_key = _worker_keys.get(private_key_pem)
+    if private_key is None:
+        private_key = serialization.load_pem_private_key(
+            private_key_pem,
+            password=None,
+            backend=default_backend()
+        )
+        _worker_keys.clear()
+        _worker_keys[private_key_pem] = private_key
+    return [sign_license_payload(private_key, vm_ip, expiry_date) for vm_ip, expiry_date in entries]
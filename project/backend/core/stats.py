@@ -0,0 +1,29 @@
+from django.db import connection
+from .cache import dashboard_stats_cache
+from .models import Organization, ThemeHistory
+
+
+def _count_dashboard_stats():
+    # One round trip instead of three separate COUNT(*) queries.
+    organizations = connection.ops.quote_name(Organization._meta.db_table)
+    theme_history = connection.ops.quote_name(ThemeHistory._meta.db_table)
+    config_json = connection.ops.quote_name(Organization._meta.get_field('config_json').column)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT "
+            f"(SELECT COUNT(*) FROM {organizations}), "
+            f"(SELECT COUNT(*) FROM {theme_history}), "
+            f"(SELECT COUNT(*) FROM {organizations} WHERE {config_json} IS NOT NULL)"
+        )
+        total_organizations, total_themes, active_themes = cursor.fetchone()
+
+    return {
+        'total_organizations': total_organizations,
+        'total_themes': total_themes,
+        'active_themes': active_themes
+    }
+
+
+def get_dashboard_stats():
+    return dashboard_stats_cache.get_or_set('counts', _count_dashboard_stats)
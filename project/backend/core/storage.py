@@ -0,0 +1,125 @@
+import os
+import mimetypes
+import posixpath
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from .executors import aiterate
+from .http import conditional_file_response, is_asgi_request
+
+# How stored files reach the client (MEDIA_DELIVERY):
+#   stream    - Django streams the file in chunks (FileResponse for local files
+#               so the WSGI server can use sendfile(2); under ASGI the chunks
+#               are read off the event loop by an async iterator)
+#   redirect  - 302 to a presigned URL; S3-compatible storage only
+#   x-accel   - empty response with X-Accel-Redirect for nginx to serve
+#   sendfile  - empty response with X-Sendfile (Apache/lighttpd); local storage only
+DELIVERY_STREAM = 'stream'
+DELIVERY_REDIRECT = 'redirect'
+DELIVERY_X_ACCEL = 'x-accel'
+DELIVERY_SENDFILE = 'sendfile'
+
+CHUNK_SIZE = 64 * 1024
+
+
+def is_object_storage(storage):
+    return getattr(storage, 'bucket_name', None) is not None
+
+
+def is_stored_file(storage, name):
+    # exists() is also true for directories on local storage. On object
+    # storage it is no help either: S3Storage.exists() always returns False
+    # while file_overwrite is on (the default), so ask for the key's size.
+    if is_object_storage(storage):
+        try:
+            storage.size(name)
+        except FileNotFoundError:
+            return False
+        return True
+    try:
+        return os.path.isfile(storage.path(name))
+    except NotImplementedError:
+        return storage.exists(name)
+
+
+def iter_storage_chunks(storage, name, chunk_size=CHUNK_SIZE):
+    # S3 objects are read straight off the response body of the S3File's
+    # boto3 object; reading the S3File itself would spool the whole object to
+    # a temporary file before returning the first byte.
+    if is_object_storage(storage):
+        body = storage.open(name, 'rb').obj.get()['Body']
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+        return
+
+    with storage.open(name, 'rb') as stored_file:
+        yield from stored_file.chunks(chunk_size)
+
+
+def read_storage_file(field_file):
+    return b''.join(iter_storage_chunks(field_file.storage, field_file.name))
+
+
+def _download_url(storage, name, filename, content_type):
+    parameters = {}
+    if filename:
+        parameters['ResponseContentDisposition'] = content_disposition_header(True, filename)
+    if content_type:
+        parameters['ResponseContentType'] = content_type
+    return storage.url(name, parameters=parameters, expire=settings.MEDIA_PRESIGNED_EXPIRY)
+
+
+def _offload_response(header, value, filename, content_type):
+    response = HttpResponse(content_type=content_type)
+    response[header] = value
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def storage_file_response(storage, name, filename=None, content_type=None, asynchronous=False):
+    content_type = content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    delivery = settings.MEDIA_DELIVERY
+
+    if delivery == DELIVERY_X_ACCEL:
+        location = posixpath.join(settings.MEDIA_ACCEL_REDIRECT_PREFIX, quote(name))
+        return _offload_response('X-Accel-Redirect', location, filename, content_type)
+
+    if delivery == DELIVERY_SENDFILE and not is_object_storage(storage):
+        return _offload_response('X-Sendfile', storage.path(name), filename, content_type)
+
+    if not is_object_storage(storage) and not asynchronous:
+        return FileResponse(
+            storage.open(name, 'rb'),
+            as_attachment=filename is not None,
+            filename=filename or '',
+            content_type=content_type
+        )
+
+    chunks = iter_storage_chunks(storage, name)
+    if asynchronous:
+        # Django's ASGI handler would otherwise read a sync iterator into a list.
+        chunks = aiterate(chunks, thread_sensitive=False)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Length'] = storage.size(name)
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def serve_storage_file(request, storage, name, etag=None, last_modified=None, filename=None,
+                       content_type=None, **cache_control):
+    # ``etag`` may be a callable so that redirects never pay for hashing.
+    if settings.MEDIA_DELIVERY == DELIVERY_REDIRECT and is_object_storage(storage):
+        return HttpResponseRedirect(_download_url(storage, name, filename, content_type))
+
+    return conditional_file_response(
+        request,
+        lambda: storage_file_response(storage, name, filename, content_type, is_asgi_request(request)),
+        etag=etag() if callable(etag) else etag,
+        last_modified=last_modified,
+        **cache_control
+    )
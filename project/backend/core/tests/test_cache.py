@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+from unittest import mock, skipUnless
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from core import cache
+from core.cache import CacheNamespace
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def two_node_caches():
+    # Each node has its own in-process tier; both share one (fake) Redis.
+    return {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'node-a'},
+        'node-b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'node-b'},
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://fake:6379/0',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+        },
+    }
+
+
+@skipUnless(fakeredis, 'needs fakeredis')
+@override_settings(CACHES=two_node_caches() if fakeredis else {}, CACHE_GENERATION_TTL=60)
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        for alias in ('default', 'node-b', 'shared'):
+            caches[alias].clear()
+        self.node_a = CacheNamespace('test', 'ORGANIZATION_CACHE_TTL')
+        self.node_b = CacheNamespace('test', 'ORGANIZATION_CACHE_TTL')
+
+    @contextmanager
+    def on_node_b(self):
+        with mock.patch.object(cache, 'LOCAL_CACHE', 'node-b'):
+            yield
+
+    def expire_generations(self, alias):
+        # Stands in for CACHE_GENERATION_TTL running out on that node.
+        for scope in (1, 2):
+            caches[alias].delete(self.node_a._generation_key(scope))
+
+    def test_entry_written_on_one_node_is_read_on_the_other(self):
+        self.node_a.set('config', {'primary': '#004F9E'}, scope=1)
+        with self.on_node_b():
+            self.assertEqual(self.node_b.get('config', scope=1), {'primary': '#004F9E'})
+            # Filled from the shared tier into node B's local tier.
+            self.assertEqual(caches['node-b'].get(self.node_b.make_key('config', scope=1)), {'primary': '#004F9E'})
+
+    def test_get_or_set_reuses_the_other_nodes_value(self):
+        self.assertEqual(self.node_a.get_or_set('stats', lambda: 'from a', scope=1), 'from a')
+        with self.on_node_b():
+            self.assertEqual(self.node_b.get_or_set('stats', lambda: 'from b', scope=1), 'from a')
+
+    def test_invalidation_on_one_node_is_seen_by_the_other(self):
+        self.node_a.set('config', 'old', scope=1)
+        self.node_a.set('config', 'untouched', scope=2)
+        with self.on_node_b():
+            self.assertEqual(self.node_b.get('config', scope=1), 'old')
+
+        with self.on_node_b():
+            self.node_b.invalidate(scope=1)
+            self.assertIsNone(self.node_b.get('config', scope=1))
+
+        # Node A memoized the old generation; once that expires it follows.
+        self.assertEqual(self.node_a.get('config', scope=1), 'old')
+        self.expire_generations('default')
+        self.assertIsNone(self.node_a.get('config', scope=1))
+        self.assertEqual(self.node_a.get('config', scope=2), 'untouched')
+
+    @override_settings(CACHE_GENERATION_TTL=0)
+    def test_invalidation_is_immediate_without_generation_memo(self):
+        self.node_a.set('config', 'old', scope=1)
+        with self.on_node_b():
+            self.assertEqual(self.node_b.get('config', scope=1), 'old')
+        self.node_a.invalidate(scope=1)
+        with self.on_node_b():
+            self.assertIsNone(self.node_b.get('config', scope=1))
+            self.node_b.set('config', 'new', scope=1)
+        self.assertEqual(self.node_a.get('config', scope=1), 'new')
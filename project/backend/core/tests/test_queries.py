@@ -0,0 +1,68 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import AssetVariant, Organization, ThemeHistory, User
+
+
+class ListQueryCountTests(TestCase):
+    # List endpoints must not issue queries per row: the count for a small
+    # page has to match the count for a large one.
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('admin', 'admin@example.com', 'password', is_super_admin=True)
+        cls.user = user
+        for index in range(6):
+            organization = Organization.objects.create(
+                name=f'Organization {index}',
+                logo=f'organizations/logos/logo_{index}.png'
+            )
+            AssetVariant.objects.create(
+                organization=organization,
+                asset='logo',
+                name=f'logo-{index}',
+                format='webp',
+                width=64,
+                height=32,
+                file=f'organizations/variants/logo-{index}.webp',
+                source_name=organization.logo.name
+            )
+            for version in ('1.0.0', '1.0.1', '1.1.0'):
+                ThemeHistory.objects.create(
+                    organization=organization,
+                    zip_file=f'theme_packages/theme_{index}_{version}.zip',
+                    version=version
+                )
+        cls.organization = organization
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertConstantQueries(self, path):
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get(path, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+        with self.assertNumQueries(len(small_page.captured_queries)):
+            response = self.client.get(path, {'page_size': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.data['results']), 2)
+
+    def test_theme_history_list(self):
+        self.assertConstantQueries('/api/themes/')
+
+    def test_organization_list(self):
+        self.assertConstantQueries('/api/organizations/')
+
+    def test_organization_themes(self):
+        self.assertConstantQueries(f'/api/organizations/{self.organization.pk}/themes/')
+
+    def test_organization_themes_skips_organization_prefetches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/organizations/{self.organization.pk}/themes/')
+        self.assertFalse([query for query in queries.captured_queries if 'asset_variants' in query['sql']])
@@ -0,0 +1,71 @@
+from unittest import skipUnless
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from core.storage import is_stored_file, iter_storage_chunks, serve_storage_file
+
+try:
+    import boto3
+    from moto import mock_aws
+    from storages.backends.s3 import S3Storage
+except ImportError:
+    mock_aws = None
+
+BUCKET = 'theme-manager-test'
+
+
+@skipUnless(mock_aws, 'needs moto and django-storages[s3]')
+class S3StorageTests(SimpleTestCase):
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        self.storage = S3Storage(
+            bucket_name=BUCKET,
+            access_key='testing',
+            secret_key='testing',
+            region_name='us-east-1',
+            location='media'
+        )
+        self.content = bytes(range(256)) * 1000
+        self.name = self.storage.save('theme_packages/theme.zip', ContentFile(self.content))
+
+    def test_iter_storage_chunks_streams_object(self):
+        chunks = list(iter_storage_chunks(self.storage, self.name, chunk_size=64 * 1024))
+        self.assertEqual(b''.join(chunks), self.content)
+        self.assertEqual([len(chunk) for chunk in chunks[:-1]], [64 * 1024] * (len(chunks) - 1))
+
+    def test_iter_storage_chunks_missing_object_raises_before_first_chunk(self):
+        chunks = iter_storage_chunks(self.storage, 'theme_packages/missing.zip')
+        with self.assertRaises(FileNotFoundError):
+            next(chunks)
+
+    def test_is_stored_file(self):
+        self.assertTrue(is_stored_file(self.storage, self.name))
+        self.assertFalse(is_stored_file(self.storage, 'theme_packages/missing.zip'))
+        self.assertFalse(is_stored_file(self.storage, 'theme_packages'))
+
+    @override_settings(MEDIA_DELIVERY='redirect', MEDIA_PRESIGNED_EXPIRY=60)
+    def test_redirect_delivery_presigns_download(self):
+        request = RequestFactory().get('/media/theme_packages/theme.zip')
+        response = serve_storage_file(
+            request,
+            self.storage,
+            self.name,
+            filename='theme.zip',
+            content_type='application/zip'
+        )
+        self.assertEqual(response.status_code, 302)
+        location = response['Location']
+        self.assertIn(f'{BUCKET}', location)
+        self.assertIn('media/theme_packages/theme.zip', location)
+        self.assertIn('response-content-disposition=attachment', location)
+        self.assertIn('response-content-type=application%2Fzip', location)
+
+    @override_settings(MEDIA_DELIVERY='stream')
+    def test_stream_delivery_reads_object(self):
+        request = RequestFactory().get('/media/theme_packages/theme.zip')
+        response = serve_storage_file(request, self.storage, self.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response['Content-Length']), len(self.content))
+        self.assertEqual(b''.join(response.streaming_content), self.content)
@@ -0,0 +1,402 @@
+import os
+import copy
+import json
+import hashlib
+import zipfile
+import itertools
+import time
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.core.files.base import ContentFile, File
+from django.db import connections, transaction
+from .models import ThemeHistory
+from .cache import organization_cache
+from .metrics import STAGE_THEME_ZIP, timed
+from .blobs import acquire_theme_blob
+from .versioning import INITIAL_VERSION, diff_theme_history, next_theme_version, theme_manifest
+from .storage import is_stored_file, iter_storage_chunks, read_storage_file
+from .zipmembers import (
+    get_cached_member,
+    get_compressed_member,
+    member_compress_type,
+    write_compressed_member,
+)
+
+logger = logging.getLogger(__name__)
+
+THEME_VERSION = INITIAL_VERSION
+THEME_ASSET_FIELDS = ['logo', 'favicon', 'banner', 'basket_image']
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Fixed member timestamp so identical inputs always produce identical archives.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def build_theme_config(organization):
+    return {
+        "theme_name": f"{organization.name} Theme",
+        "app": {
+            "title": organization.app_title,
+            "browser_title": organization.app_title
+        },
+        "colors": {
+            "primary": organization.primary_color,
+            "secondary": organization.secondary_color,
+            "text": organization.text_color
+        },
+        "font_family": "Arial, sans-serif",
+        "assets": {},
+        "version": THEME_VERSION
+    }
+
+
+def iter_theme_assets(organization):
+    # Yields (key, asset_name, field_file, variant); variant is None for the
+    # uploaded originals and the AssetVariant for pre-rendered sizes/formats.
+    for field_name in THEME_ASSET_FIELDS:
+        field_file = getattr(organization, field_name)
+        if field_file and field_file.name:
+            ext = os.path.splitext(field_file.name)[1]
+            yield field_name, f'assets/{field_name}{ext}', field_file, None
+
+    for variant in organization.asset_variants.all():
+        yield variant.asset, f'assets/variants/{variant.filename}', variant.file, variant
+
+
+def register_theme_asset(config_data, key, asset_name, variant):
+    if variant is None:
+        config_data['assets'][key] = asset_name
+        return
+
+    config_data['assets'].setdefault('variants', {}).setdefault(key, []).append({
+        'path': asset_name,
+        'format': variant.format,
+        'width': variant.width,
+        'height': variant.height,
+    })
+
+
+def _planned_theme_config(config_data, assets):
+    planned = copy.deepcopy(config_data)
+    for key, asset_name, field_file, variant, content_hash in assets:
+        register_theme_asset(planned, key, asset_name, variant)
+    return planned
+
+
+def theme_package_version(organization, config_data, assets):
+    # Reads the previous package's manifest (database, maybe storage), so
+    # callers run it before the STAGE_THEME_ZIP timer starts. Assumes every
+    # asset makes it into the package.
+    return next_theme_version(organization, theme_manifest(_planned_theme_config(config_data, assets), assets))
+
+
+def _final_theme_version(organization, config_data, assets, version, planned_assets):
+    # Only when an asset was skipped does the version need recomputing.
+    if config_data['assets'] == planned_assets:
+        return version
+    return next_theme_version(organization, theme_manifest(config_data, assets))
+
+
+def theme_package_filename(organization):
+    return f"theme_{organization.name.replace(' ', '_').lower()}.zip"
+
+
+def _hash_file(field_file):
+    try:
+        content_hash = hashlib.sha256()
+        for chunk in iter_storage_chunks(field_file.storage, field_file.name):
+            content_hash.update(chunk)
+        return content_hash.hexdigest()
+    except Exception:
+        return None
+
+
+def _asset_hash(organization, field_file):
+    # Cached per organization so repeat builds don't re-read every asset from
+    # storage; Organization and AssetVariant changes invalidate the scope.
+    key = f'asset_hash:{field_file.name}'
+    content_hash = organization_cache.get(key, scope=organization.pk)
+    if content_hash is None:
+        content_hash = _hash_file(field_file)
+        if content_hash:
+            organization_cache.set(key, content_hash, scope=organization.pk)
+    return content_hash
+
+
+def hash_theme_assets(organization):
+    # Same items as iter_theme_assets plus each file's SHA-256 (None if unreadable).
+    return [
+        (key, asset_name, field_file, variant, _asset_hash(organization, field_file))
+        for key, asset_name, field_file, variant in iter_theme_assets(organization)
+    ]
+
+
+def compute_theme_digest(organization, assets=None):
+    if assets is None:
+        assets = hash_theme_assets(organization)
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(build_theme_config(organization), sort_keys=True).encode())
+
+    for key, asset_name, field_file, variant, content_hash in assets:
+        digest.update(asset_name.encode())
+        digest.update(content_hash.encode() if content_hash else b'\x00missing')
+
+    return digest.hexdigest()
+
+
+def _zip_info(name, compress_type=zipfile.ZIP_DEFLATED):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def build_theme_package(organization, config_data, assets=None, version=None):
+    # Asset members are spliced in pre-compressed (see core/zipmembers.py), so
+    # only config.json is deflated on every build.
+    if assets is None:
+        assets = hash_theme_assets(organization)
+    if version is None:
+        version = theme_package_version(organization, config_data, assets)
+    planned_assets = _planned_theme_config(config_data, assets)['assets']
+
+    zip_buffer = BytesIO()
+    with timed(STAGE_THEME_ZIP), zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for key, asset_name, field_file, variant, content_hash in assets:
+            try:
+                compress_type = member_compress_type(asset_name)
+                member = get_compressed_member(field_file, content_hash, compress_type)
+                write_compressed_member(zip_file, _zip_info(asset_name), member)
+                register_theme_asset(config_data, key, asset_name, variant)
+            except Exception:
+                logger.exception(
+                    'Skipping theme asset',
+                    extra={'organization': organization.pk, 'asset': key, 'path': field_file.name}
+                )
+
+        config_data['version'] = _final_theme_version(organization, config_data, assets, version, planned_assets)
+        zip_file.writestr(_zip_info('config.json'), json.dumps(config_data, indent=2))
+
+    return zip_buffer.getvalue()
+
+
+class _ZipStream:
+    # Write-only sink for ZipFile; without seek() zipfile emits data descriptors,
+    # so members can be written in one forward pass and drained as they go.
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_cached_theme_package(organization, digest):
+    latest = organization.theme_history.order_by('-created_at', '-id').first()
+    if latest and latest.content_hash == digest and latest.zip_file:
+        if is_stored_file(latest.zip_file.storage, latest.zip_file.name):
+            return latest
+    return None
+
+
+def ensure_package_hash(theme_history):
+    # Rows written before package_hash existed are hashed on first request.
+    if not theme_history.package_hash:
+        theme_history.package_hash = _hash_file(theme_history.zip_file) or ''
+        if theme_history.package_hash:
+            theme_history.save(update_fields=['package_hash'])
+    return theme_history.package_hash
+
+
+def _save_theme_history(organization, config_data, assets, digest, content_file, package_hash):
+    organization.config_json = config_data
+    organization.save(update_fields=['config_json', 'updated_at'])
+
+    # Identical packages share one stored file (see core/blobs.py).
+    with transaction.atomic():
+        blob = acquire_theme_blob(content_file, package_hash)
+        return ThemeHistory.objects.create(
+            organization=organization,
+            version=config_data['version'],
+            content_hash=digest,
+            package_hash=package_hash,
+            manifest=theme_manifest(config_data, assets),
+            blob=blob,
+            zip_file=blob.file.name
+        )
+
+
+def get_or_create_theme_package(organization):
+    # Only rebuild when branding or asset contents differ from the latest package.
+    assets = hash_theme_assets(organization)
+    digest = compute_theme_digest(organization, assets)
+
+    latest = get_cached_theme_package(organization, digest)
+    if latest:
+        try:
+            return latest, read_storage_file(latest.zip_file), False
+        except OSError:
+            pass
+
+    config_data = build_theme_config(organization)
+    version = theme_package_version(organization, config_data, assets)
+    content = build_theme_package(organization, config_data, assets, version)
+    theme_history = _save_theme_history(
+        organization,
+        config_data,
+        assets,
+        digest,
+        ContentFile(content),
+        hashlib.sha256(content).hexdigest()
+    )
+
+    return theme_history, content, True
+
+
+def stream_theme_package(organization, digest, assets=None, version=None, chunk_size=STREAM_CHUNK_SIZE):
+    # Yields the archive while it is being written, copying each chunk into a
+    # temporary file that becomes the ThemeHistory package once the zip is complete.
+    # Pass ``version`` (theme_package_version) to keep its queries out of
+    # whatever times the iteration.
+    if assets is None:
+        assets = hash_theme_assets(organization)
+
+    config_data = build_theme_config(organization)
+    if version is None:
+        version = theme_package_version(organization, config_data, assets)
+    planned_assets = _planned_theme_config(config_data, assets)['assets']
+    stream = _ZipStream()
+    package_hash = hashlib.sha256()
+
+    with tempfile.TemporaryFile() as history_file:
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for key, asset_name, field_file, variant, content_hash in assets:
+                compress_type = member_compress_type(asset_name)
+                # The first chunk is read before the member is opened, so a
+                # missing or unreadable asset is skipped without a trace in
+                # the archive. Once a member has started, a read error aborts
+                # the whole package rather than storing a truncated one.
+                try:
+                    member = get_cached_member(content_hash, compress_type)
+                    if not member:
+                        chunks = iter_storage_chunks(field_file.storage, field_file.name, chunk_size)
+                        first_chunk = next(chunks, b'')
+                except Exception:
+                    logger.exception(
+                        'Skipping theme asset',
+                        extra={'organization': organization.pk, 'asset': key, 'path': field_file.name}
+                    )
+                    continue
+
+                if member:
+                    write_compressed_member(zip_file, _zip_info(asset_name), member)
+                    data = stream.drain()
+                    history_file.write(data)
+                    package_hash.update(data)
+                    yield data
+                else:
+                    with zip_file.open(_zip_info(asset_name, compress_type), 'w') as zip_member:
+                        for chunk in itertools.chain([first_chunk], chunks):
+                            zip_member.write(chunk)
+                            data = stream.drain()
+                            if data:
+                                history_file.write(data)
+                                package_hash.update(data)
+                                yield data
+                register_theme_asset(config_data, key, asset_name, variant)
+
+            config_data['version'] = _final_theme_version(organization, config_data, assets, version, planned_assets)
+            zip_file.writestr(_zip_info('config.json'), json.dumps(config_data, indent=2))
+
+        data = stream.drain()
+        history_file.write(data)
+        package_hash.update(data)
+        yield data
+
+        history_file.seek(0)
+        _save_theme_history(
+            organization,
+            config_data,
+            assets,
+            digest,
+            File(history_file, name=theme_package_filename(organization)),
+            package_hash.hexdigest()
+        )
+
+
+def build_delta_package(base, target):
+    # Only the members that differ from ``base``, the new config.json and a
+    # delta.json listing what to delete.
+    diff = diff_theme_history(base, target)
+    members = [*diff['assets']['added'], *diff['assets']['changed']]
+
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(BytesIO(read_storage_file(target.zip_file))) as package:
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as delta:
+            for name in members:
+                delta.writestr(_zip_info(name, member_compress_type(name)), package.read(name))
+            delta.writestr(_zip_info('config.json'), package.read('config.json'))
+            delta.writestr(_zip_info('delta.json'), json.dumps({
+                'from': diff['from'],
+                'to': diff['to'],
+                'bump': diff['bump'],
+                'updated': members,
+                'removed': diff['assets']['removed'],
+            }, indent=2))
+
+    return diff, zip_buffer.getvalue()
+
+
+def _bulk_generate_one(organization):
+    started = time.perf_counter()
+    result = {'organization': organization.id, 'name': organization.name}
+    try:
+        theme_history, content, created = get_or_create_theme_package(organization)
+        result.update({
+            'status': 'generated' if created else 'cached',
+            'theme_history': theme_history,
+        })
+    except Exception as e:
+        logger.exception('Theme package generation failed', extra={'organization': organization.pk})
+        result.update({'status': 'failed', 'error': str(e)})
+    finally:
+        # Worker threads open their own connections; don't leak them.
+        connections.close_all()
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def bulk_generate_theme_packages(organizations, max_workers):
+    # Builds every package in a thread pool and reports per-organization
+    # outcomes instead of stopping at the first failure.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_bulk_generate_one, organizations))
+
+
+def write_bulk_theme_archive(results, target):
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED) as archive:
+        for result in results:
+            theme_history = result.get('theme_history')
+            if not theme_history:
+                continue
+            arcname = f"{result['organization']}/{theme_package_filename(theme_history.organization)}"
+            package = theme_history.zip_file
+            with archive.open(arcname, 'w') as member:
+                for chunk in iter_storage_chunks(package.storage, package.name, STREAM_CHUNK_SIZE):
+                    member.write(chunk)
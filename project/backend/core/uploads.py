@@ -0,0 +1,29 @@
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+
+class AssetSizeLimitUploadHandler(FileUploadHandler):
+    # Runs ahead of Django's memory/temp-file handlers and drops a file as soon
+    # as it grows past its field's limit, so oversized uploads are never
+    # buffered. Dropped fields are recorded on ``request.oversized_uploads``.
+    def __init__(self, request, limits):
+        super().__init__(request)
+        self.limits = limits
+        self.limit = None
+        self.received = 0
+        request.oversized_uploads = {}
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.limit = self.limits.get(field_name)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limit is not None:
+            self.received += len(raw_data)
+            if self.received > self.limit:
+                self.request.oversized_uploads[self.field_name] = self.received
+                raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,12 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import OrganizationViewSet, CustomTokenObtainPairView, LicenseViewSet, DashboardViewSet
+from .views import (
+    OrganizationViewSet,
+    CustomTokenObtainPairView,
+    LicenseViewSet,
+    DashboardViewSet,
+    JobViewSet,
+    ThemeHistoryViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'organizations', OrganizationViewSet, basename='organization')
+router.register(r'themes', ThemeHistoryViewSet, basename='theme')
 router.register(r'license', LicenseViewSet, basename='license')
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
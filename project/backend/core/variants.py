@@ -0,0 +1,158 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image, features
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from .models import Organization, AssetVariant
+
+logger = logging.getLogger(__name__)
+
+FAVICON_SIZES = [16, 32, 48]
+
+PIL_FORMATS = {
+    'png': 'PNG',
+    'jpg': 'JPEG',
+    'ico': 'ICO',
+    'webp': 'WEBP',
+    'avif': 'AVIF',
+}
+
+_executor = None
+
+
+def alternate_formats():
+    formats = ['webp']
+    if features.check('avif'):
+        formats.append('avif')
+    return formats
+
+
+def encode_image(img, fmt, **options):
+    if fmt == 'jpg' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    elif fmt != 'jpg' and img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA')
+
+    buffer = BytesIO()
+    img.save(buffer, PIL_FORMATS[fmt], **options)
+    return buffer.getvalue()
+
+
+def _resize(img, width, height):
+    if (width, height) == img.size:
+        return img
+    return img.convert('RGBA').resize((width, height), Image.Resampling.LANCZOS)
+
+
+def render_variants(asset, img):
+    # Yields (name, format, width, height, content) for every variant of the asset.
+    if asset == 'favicon':
+        # Never upscale: a 16px upload gets a 16px icon only. Pillow builds
+        # the smaller ICO sizes from the image it is given, so that is the
+        # largest one kept.
+        favicon_sizes = [size for size in FAVICON_SIZES if size <= min(img.size)] or [min(img.size)]
+        largest = max(favicon_sizes)
+        sizes = [(size, size) for size in favicon_sizes]
+        ico_source = _resize(img, largest, largest)
+        yield 'favicon', 'ico', largest, largest, encode_image(ico_source, 'ico', sizes=sizes)
+        for size in favicon_sizes:
+            yield f'favicon-{size}', 'png', size, size, encode_image(_resize(img, size, size), 'png', optimize=True)
+        return
+
+    if asset == 'banner':
+        source_format = 'jpg' if img.format == 'JPEG' else 'png'
+        widths = [width for width in settings.ASSET_BANNER_WIDTHS if width < img.width] + [img.width]
+        for width in widths:
+            height = max(1, round(img.height * width / img.width))
+            resized = _resize(img, width, height)
+            if width != img.width:
+                yield f'banner-{width}', source_format, width, height, encode_image(resized, source_format)
+            for fmt in alternate_formats():
+                yield f'banner-{width}', fmt, width, height, encode_image(resized, fmt)
+        return
+
+    for fmt in alternate_formats():
+        yield asset, fmt, img.width, img.height, encode_image(img, fmt)
+
+
+def generate_asset_variants(organization, asset):
+    field_file = getattr(organization, asset)
+    source_name = field_file.name if field_file else ''
+
+    variants = []
+    if source_name:
+        with field_file.open('rb') as source:
+            img = Image.open(source)
+            img.load()
+
+        for name, fmt, width, height, content in render_variants(asset, img):
+            variant = AssetVariant(
+                organization=organization,
+                asset=asset,
+                name=name,
+                format=fmt,
+                width=width,
+                height=height,
+                source_name=source_name
+            )
+            variant.file.save(f'{organization.pk}_{name}.{fmt}', ContentFile(content), save=False)
+            variants.append(variant)
+
+    with transaction.atomic():
+        current = Organization.objects.select_for_update().filter(pk=organization.pk).values_list(asset, flat=True).first()
+        if (current or '') != source_name:
+            # The asset was replaced while rendering; the newer task owns the variants.
+            for variant in variants:
+                variant.file.delete(save=False)
+            return []
+
+        stale = list(AssetVariant.objects.filter(organization=organization, asset=asset))
+        AssetVariant.objects.filter(pk__in=[variant.pk for variant in stale]).delete()
+        AssetVariant.objects.bulk_create(variants)
+
+    for variant in stale:
+        variant.file.delete(save=False)
+
+    return variants
+
+
+def _generate_in_background(organization_id, asset):
+    try:
+        organization = Organization.objects.filter(pk=organization_id).first()
+        if organization:
+            generate_asset_variants(organization, asset)
+    except Exception:
+        logger.exception(
+            'Asset variant generation failed',
+            extra={'organization': organization_id, 'asset': asset}
+        )
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASSET_VARIANT_WORKERS,
+            thread_name_prefix='asset-variants'
+        )
+    return _executor
+
+
+def schedule_asset_variants(organization, assets):
+    # Rendering starts once the upload's transaction has committed.
+    assets = list(assets)
+    if not assets:
+        return
+
+    def submit():
+        for asset in assets:
+            if settings.ASSET_VARIANTS_ASYNC:
+                _get_executor().submit(_generate_in_background, organization.pk, asset)
+            else:
+                generate_asset_variants(organization, asset)
+
+    transaction.on_commit(submit)
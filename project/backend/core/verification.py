@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.backends import default_backend
+
+# Offline verification for the license.json files produced by LicenseViewSet.
+# Only depends on `cryptography` so it can be copied into consuming services.
+
+REASON_MALFORMED = 'malformed'
+REASON_INVALID_SIGNATURE = 'invalid_signature'
+REASON_EXPIRED = 'expired'
+
+PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+
+
+def license_payload(vm_id, expiry):
+    return json.dumps({"vm_id": vm_id, "expiry": expiry}, separators=(",", ":")).encode()
+
+
+class LicenseVerifier:
+    def __init__(self, public_key_pem):
+        if isinstance(public_key_pem, str):
+            public_key_pem = public_key_pem.encode()
+        self.public_key = serialization.load_pem_public_key(public_key_pem, backend=default_backend())
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as pem_file:
+            return cls(pem_file.read())
+
+    def verify(self, license_data, today=None):
+        if isinstance(license_data, (str, bytes)):
+            try:
+                license_data = json.loads(license_data)
+            except ValueError:
+                return {'valid': False, 'reason': REASON_MALFORMED}
+
+        if not isinstance(license_data, dict):
+            return {'valid': False, 'reason': REASON_MALFORMED}
+
+        vm_id = license_data.get('vm_id')
+        expiry = license_data.get('expiry')
+        result = {'valid': False, 'vm_id': vm_id, 'expiry': expiry}
+
+        try:
+            signature = bytes.fromhex(license_data['signature'])
+            expiry_date = datetime.strptime(expiry, '%Y-%m-%d').date()
+        except (KeyError, TypeError, ValueError):
+            result['reason'] = REASON_MALFORMED
+            return result
+
+        try:
+            self.public_key.verify(signature, license_payload(vm_id, expiry), PSS_PADDING, hashes.SHA256())
+        except InvalidSignature:
+            result['reason'] = REASON_INVALID_SIGNATURE
+            return result
+
+        if expiry_date < (today or date.today()):
+            result['reason'] = REASON_EXPIRED
+            return result
+
+        result['valid'] = True
+        return result
+
+    def verify_many(self, licenses, workers=1, today=None):
+        today = today or date.today()
+        if workers <= 1 or len(licenses) < 2:
+            return [self.verify(license_data, today) for license_data in licenses]
+
+        # Hand each thread a contiguous slice so per-task overhead stays small.
+        size = -(-len(licenses) // workers)
+        chunks = [licenses[i:i + size] for i in range(0, len(licenses), size)]
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            results = executor.map(lambda chunk: [self.verify(item, today) for item in chunk], chunks)
+            return [result for chunk in results for result in chunk]
@@ -0,0 +1,137 @@
+import json
+import hashlib
+import zipfile
+from io import BytesIO
+from .storage import read_storage_file
+
+INITIAL_VERSION = '1.0.0'
+
+BUMP_MAJOR = 'major'
+BUMP_MINOR = 'minor'
+BUMP_PATCH = 'patch'
+
+# Renaming the app is a breaking change for consumers, new or changed assets
+# add to the package and everything else (colors, fonts) is a patch.
+MAJOR_CONFIG_KEYS = ('theme_name', 'app')
+UNVERSIONED_CONFIG_KEYS = ('version', 'assets')
+
+
+def registered_asset_paths(config_data):
+    assets = config_data.get('assets', {})
+    paths = {path for key, path in assets.items() if key != 'variants'}
+    for variants in assets.get('variants', {}).values():
+        paths.update(variant['path'] for variant in variants)
+    return paths
+
+
+def theme_manifest(config_data, assets):
+    # ``assets`` are hash_theme_assets() tuples; only members that made it
+    # into the package are listed.
+    paths = registered_asset_paths(config_data)
+    return {
+        'config': config_data,
+        'assets': {
+            asset_name: content_hash
+            for key, asset_name, field_file, variant, content_hash in assets
+            if asset_name in paths and content_hash
+        },
+    }
+
+
+def read_package_manifest(theme_history):
+    # For rows written before manifests were stored.
+    with zipfile.ZipFile(BytesIO(read_storage_file(theme_history.zip_file))) as archive:
+        return {
+            'config': json.loads(archive.read('config.json')),
+            'assets': {
+                name: hashlib.sha256(archive.read(name)).hexdigest()
+                for name in archive.namelist() if name != 'config.json'
+            },
+        }
+
+
+def ensure_manifest(theme_history):
+    if not theme_history.manifest:
+        theme_history.manifest = read_package_manifest(theme_history)
+        theme_history.save(update_fields=['manifest'])
+    return theme_history.manifest
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict) and value:
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f'{prefix}{key}.'))
+        return flat
+    return {prefix.rstrip('.'): value}
+
+
+def _versioned_config(config_data):
+    return {key: value for key, value in config_data.items() if key not in UNVERSIONED_CONFIG_KEYS}
+
+
+def classify_change(old_manifest, new_manifest):
+    old_config, new_config = old_manifest['config'], new_manifest['config']
+    if any(old_config.get(key) != new_config.get(key) for key in MAJOR_CONFIG_KEYS):
+        return BUMP_MAJOR
+    if old_manifest['assets'] != new_manifest['assets']:
+        return BUMP_MINOR
+    if _versioned_config(old_config) != _versioned_config(new_config):
+        return BUMP_PATCH
+    return None
+
+
+def bump_version(version, bump):
+    try:
+        major, minor, patch = (int(part) for part in version.split('.'))
+    except (AttributeError, ValueError):
+        return INITIAL_VERSION
+
+    if bump == BUMP_MAJOR:
+        return f'{major + 1}.0.0'
+    if bump == BUMP_MINOR:
+        return f'{major}.{minor + 1}.0'
+    if bump == BUMP_PATCH:
+        return f'{major}.{minor}.{patch + 1}'
+    return version
+
+
+def next_theme_version(organization, manifest):
+    previous = organization.theme_history.exclude(zip_file='').order_by('-created_at', '-id').first()
+    if previous is None:
+        return INITIAL_VERSION
+
+    try:
+        previous_manifest = ensure_manifest(previous)
+    except (KeyError, OSError, ValueError, zipfile.BadZipFile):
+        return bump_version(previous.version, BUMP_MINOR)
+    return bump_version(previous.version, classify_change(previous_manifest, manifest))
+
+
+def diff_theme_history(base, target):
+    base_manifest, target_manifest = ensure_manifest(base), ensure_manifest(target)
+
+    base_config = _flatten(_versioned_config(base_manifest['config']))
+    target_config = _flatten(_versioned_config(target_manifest['config']))
+    config_changes = {
+        key: {'from': base_config.get(key), 'to': target_config.get(key)}
+        for key in sorted(base_config.keys() | target_config.keys())
+        if base_config.get(key) != target_config.get(key)
+    }
+
+    base_assets, target_assets = base_manifest['assets'], target_manifest['assets']
+    return {
+        'from': {'id': base.id, 'version': base.version},
+        'to': {'id': target.id, 'version': target.version},
+        'bump': classify_change(base_manifest, target_manifest),
+        'config': config_changes,
+        'assets': {
+            'added': {name: target_assets[name] for name in sorted(target_assets.keys() - base_assets.keys())},
+            'removed': sorted(base_assets.keys() - target_assets.keys()),
+            'changed': {
+                name: {'from': base_assets[name], 'to': target_assets[name]}
+                for name in sorted(base_assets.keys() & target_assets.keys())
+                if base_assets[name] != target_assets[name]
+            },
+        },
+    }
@@ -1,178 +1,381 @@
 import os
+import time
 import zipfile
-import json
-import hashlib
-import base64
-from io import BytesIO
-from datetime import datetime
-from django.http import HttpResponse
-from django.core.files.base import ContentFile
+import tempfile
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import Organization, ThemeHistory, License, MasterKey
-from .serializers import OrganizationSerializer, ThemeHistorySerializer, LicenseSerializer
+from .models import Organization, ThemeHistory, License, Job
+from .serializers import OrganizationSerializer, ThemeHistorySerializer, LicenseSerializer, JobSerializer
 from .permissions import IsSuperAdmin
+from .authentication import CustomTokenObtainPairSerializer
+from .assets import ASSET_RULES
+from .uploads import AssetSizeLimitUploadHandler
+from .optimization import optimization_requested
+from .variants import schedule_asset_variants
+from .jobs import enqueue_job
+from .pagination import CreatedAtCursorPagination
+from .executors import aiterate
+from .http import ConditionalGetMixin, is_asgi_request, strong_etag
+from .storage import serve_storage_file, storage_file_response
+from .metrics import STAGE_THEME_ZIP, timed_iter
+from .stats import get_dashboard_stats
+from .licenses import (
+    build_license_batch_package,
+    build_license_package,
+    license_json_filename,
+    license_package_filename,
+    master_key_provider,
+    parse_license_request,
+)
+from .versioning import diff_theme_history
+from .themes import (
+    build_delta_package,
+    build_theme_config,
+    bulk_generate_theme_packages,
+    compute_theme_digest,
+    ensure_package_hash,
+    get_cached_theme_package,
+    get_or_create_theme_package,
+    hash_theme_assets,
+    stream_theme_package,
+    theme_package_filename,
+    theme_package_version,
+    write_bulk_theme_archive,
+)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
-
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200:
-            from .models import User
-            try:
-                user = User.objects.get(username=request.data.get('username'))
-                response.data['user'] = {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'is_super_admin': user.is_super_admin
-                }
-            except User.DoesNotExist:
-                pass
-        return response
+    serializer_class = CustomTokenObtainPairSerializer
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [IsSuperAdmin]
+    pagination_class = CreatedAtCursorPagination
+
+    # Model columns backing serializer fields that are not columns themselves.
+    sparse_field_sources = {
+        'logo_url': 'logo',
+        'favicon_url': 'favicon',
+        'banner_url': 'banner',
+        'basket_image_url': 'basket_image',
+    }
+
+    def initialize_request(self, request, *args, **kwargs):
+        limits = {field_name: rule.max_bytes for field_name, rule in ASSET_RULES.items()}
+        if optimization_requested(request):
+            # Let larger originals through; the limits are enforced after optimization.
+            limits = {
+                field_name: max(limit, settings.ASSET_OPTIMIZATION_MAX_INPUT_BYTES)
+                for field_name, limit in limits.items()
+            }
+        request.upload_handlers.insert(0, AssetSizeLimitUploadHandler(request, limits))
+        return super().initialize_request(request, *args, **kwargs)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
+    def get_sparse_fields(self):
+        if self.request.method != 'GET' or self.action not in ('list', 'retrieve'):
+            return None
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return [name.strip() for name in fields.split(',') if name.strip()]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields:
+            columns = {self.sparse_field_sources.get(name, name) for name in fields}
+            columns = {name for name in columns if name in self._concrete_fields()}
+            # id and created_at are always needed for the cursor, updated_at
+            # for Last-Modified.
+            queryset = queryset.only('id', 'created_at', 'updated_at', *columns)
+        if not fields or 'variants' in fields:
+            queryset = queryset.prefetch_related('asset_variants')
+        return queryset
+
+    def perform_create(self, serializer):
+        organization = serializer.save()
+        schedule_asset_variants(
+            organization,
+            [field_name for field_name in ASSET_RULES if getattr(organization, field_name)]
+        )
+
+    def perform_update(self, serializer):
+        previous = {field_name: getattr(serializer.instance, field_name).name for field_name in ASSET_RULES}
+        organization = serializer.save()
+        schedule_asset_variants(
+            organization,
+            [
+                field_name for field_name in ASSET_RULES
+                if getattr(organization, field_name).name != previous[field_name]
+            ]
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_last_modified(self, organization):
+        timestamps = [organization.updated_at]
+        # Variants are rendered after the save, so they can be newer than the row.
+        if 'asset_variants' in getattr(organization, '_prefetched_objects_cache', {}):
+            timestamps.extend(variant.created_at for variant in organization.asset_variants.all())
+        return max(timestamps)
+
+    @action(detail=True, methods=['get'])
+    def theme(self, request, pk=None):
+        organization = self.get_object()
+        theme_history = organization.theme_history.order_by('-created_at', '-id').first()
+        if not theme_history or not theme_history.zip_file:
+            return Response({'error': 'No theme package has been generated'}, status=status.HTTP_404_NOT_FOUND)
+
+        package_hash = ensure_package_hash(theme_history)
+        if not package_hash:
+            return Response({'error': 'Theme package file is missing'}, status=status.HTTP_404_NOT_FOUND)
+
+        response = serve_storage_file(
+            request,
+            theme_history.zip_file.storage,
+            theme_history.zip_file.name,
+            etag=strong_etag(package_hash),
+            last_modified=theme_history.created_at,
+            filename=theme_package_filename(organization),
+            content_type='application/zip',
+            private=True,
+            no_cache=True
+        )
+        response['X-Theme-Version'] = theme_history.version
+        return response
+
+    @action(detail=True, methods=['get'])
+    def themes(self, request, pk=None):
+        # Only the pk is needed; get_object() would also run the list's
+        # prefetches for nothing.
+        organization = get_object_or_404(Organization.objects.only('pk'), pk=pk)
+        self.check_object_permissions(request, organization)
+        queryset = filter_theme_history(
+            ThemeHistory.objects.filter(organization=organization).select_related('organization'),
+            request.query_params
+        )
+
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ThemeHistorySerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    def _concrete_fields(self):
+        return {field.name for field in Organization._meta.concrete_fields}
+
     @action(detail=True, methods=['post'])
     def generate_theme(self, request, pk=None):
         organization = self.get_object()
 
-        config_data = {
-            "theme_name": f"{organization.name} Theme",
-            "app": {
-                "title": organization.app_title,
-                "browser_title": organization.app_title
-            },
-            "colors": {
-                "primary": organization.primary_color,
-                "secondary": organization.secondary_color,
-                "text": organization.text_color
-            },
-            "font_family": "Arial, sans-serif",
-            "assets": {},
-            "version": "1.0.0"
-        }
-
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            if organization.logo and organization.logo.name:
-                try:
-                    with organization.logo.open('rb') as logo_file:
-                        logo_content = logo_file.read()
-                    logo_ext = os.path.splitext(organization.logo.name)[1]
-                    asset_name = f'assets/logo{logo_ext}'
-                    zip_file.writestr(asset_name, logo_content)
-                    config_data['assets']['logo'] = asset_name
-                except Exception as e:
-                    print(f"Error adding logo: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            if organization.favicon and organization.favicon.name:
-                try:
-                    with organization.favicon.open('rb') as favicon_file:
-                        favicon_content = favicon_file.read()
-                    favicon_ext = os.path.splitext(organization.favicon.name)[1]
-                    asset_name = f'assets/favicon{favicon_ext}'
-                    zip_file.writestr(asset_name, favicon_content)
-                    config_data['assets']['favicon'] = asset_name
-                except Exception as e:
-                    print(f"Error adding favicon: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            if organization.banner and organization.banner.name:
-                try:
-                    with organization.banner.open('rb') as banner_file:
-                        banner_content = banner_file.read()
-                    banner_ext = os.path.splitext(organization.banner.name)[1]
-                    asset_name = f'assets/banner{banner_ext}'
-                    zip_file.writestr(asset_name, banner_content)
-                    config_data['assets']['banner'] = asset_name
-                except Exception as e:
-                    print(f"Error adding banner: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            if organization.basket_image and organization.basket_image.name:
-                try:
-                    with organization.basket_image.open('rb') as basket_file:
-                        basket_content = basket_file.read()
-                    basket_ext = os.path.splitext(organization.basket_image.name)[1]
-                    asset_name = f'assets/basket_image{basket_ext}'
-                    zip_file.writestr(asset_name, basket_content)
-                    config_data['assets']['basket_image'] = asset_name
-                except Exception as e:
-                    print(f"Error adding basket_image: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            zip_file.writestr('config.json', json.dumps(config_data, indent=2))
-
-        organization.config_json = config_data
-        organization.save()
-
-        zip_buffer.seek(0)
-        filename = f"theme_{organization.name.replace(' ', '_').lower()}.zip"
-
-        theme_history = ThemeHistory.objects.create(
-            organization=organization,
-            version="1.0.0"
-        )
-        theme_history.zip_file.save(filename, ContentFile(zip_buffer.read()), save=True)
+        if _query_flag(request, 'async'):
+            job = enqueue_job(Job.KIND_THEME, {'organization': organization.pk}, request.user)
+            return _job_accepted_response(request, job)
+
+        filename = theme_package_filename(organization)
+
+        if _query_flag(request, 'stream', settings.THEME_PACKAGE_STREAMING):
+            assets = hash_theme_assets(organization)
+            digest = compute_theme_digest(organization, assets)
+            theme_history = get_cached_theme_package(organization, digest)
+            if theme_history:
+                response = storage_file_response(
+                    theme_history.zip_file.storage,
+                    theme_history.zip_file.name,
+                    content_type='application/zip',
+                    asynchronous=is_asgi_request(request)
+                )
+                created = False
+            else:
+                version = theme_package_version(organization, build_theme_config(organization), assets)
+                content = timed_iter(STAGE_THEME_ZIP, stream_theme_package(organization, digest, assets, version))
+                if is_asgi_request(request):
+                    content = aiterate(content)
+                response = StreamingHttpResponse(content, content_type='application/zip')
+                created = True
+        else:
+            theme_history, content, created = get_or_create_theme_package(organization)
+            response = HttpResponse(content, content_type='application/zip')
 
-        zip_buffer.seek(0)
-        response = HttpResponse(zip_buffer.read(), content_type='application/zip')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Theme-Cache'] = 'miss' if created else 'hit'
         return response
 
+    @action(detail=False, methods=['post'])
+    def bulk_generate_theme(self, request):
+        ids = request.data.get('ids')
 
-def get_or_create_master_key():
-    from cryptography.hazmat.primitives.asymmetric import rsa
-    from cryptography.hazmat.primitives import serialization
-    from cryptography.hazmat.backends import default_backend
-
-    master_key = MasterKey.objects.first()
+        if ids == 'all':
+            organizations = list(Organization.objects.all())
+            missing = []
+        elif isinstance(ids, list) and ids:
+            try:
+                ids = [_parse_id(pk) for pk in ids]
+            except ValueError:
+                return Response(
+                    {'error': 'ids must be a list of integers or "all"'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            organizations = list(Organization.objects.filter(pk__in=ids))
+            found = {organization.id for organization in organizations}
+            missing = [pk for pk in dict.fromkeys(ids) if pk not in found]
+        else:
+            return Response(
+                {'error': 'ids must be a list of integers or "all"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    if not master_key:
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
-        public_key = private_key.public_key()
-
-        private_key_pem = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ).decode()
-
-        public_key_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ).decode()
-
-        master_key = MasterKey.objects.create(
-            private_key_pem=private_key_pem,
-            public_key_pem=public_key_pem
+        started = time.perf_counter()
+        results = bulk_generate_theme_packages(organizations, settings.THEME_BULK_WORKERS)
+        results.extend(
+            {'organization': pk, 'status': 'failed', 'error': 'Organization not found', 'elapsed_ms': 0}
+            for pk in missing
         )
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        if request.data.get('format') == 'zip':
+            archive = tempfile.TemporaryFile()
+            write_bulk_theme_archive(results, archive)
+            archive.seek(0)
+            response = FileResponse(archive, content_type='application/zip')
+            response['Content-Disposition'] = 'attachment; filename="themes.zip"'
+            return response
+
+        manifest = []
+        for result in results:
+            theme_history = result.pop('theme_history', None)
+            if theme_history:
+                result['theme_history_id'] = theme_history.id
+                result['zip_file_url'] = request.build_absolute_uri(theme_history.zip_file.url)
+            manifest.append(result)
+
+        return Response({
+            'total': len(manifest),
+            'succeeded': sum(1 for result in manifest if result['status'] != 'failed'),
+            'failed': sum(1 for result in manifest if result['status'] == 'failed'),
+            'elapsed_ms': elapsed_ms,
+            'results': manifest,
+        })
+
+
+class ThemeHistoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ThemeHistory.objects.select_related('organization')
+    serializer_class = ThemeHistorySerializer
+    permission_classes = [IsSuperAdmin]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = filter_theme_history(super().get_queryset(), self.request.query_params)
+        organization = self.request.query_params.get('organization')
+        if organization:
+            try:
+                organization_id = int(organization)
+            except ValueError:
+                raise ValidationError({'organization': 'Must be an organization id'})
+            queryset = queryset.filter(organization_id=organization_id)
+        return queryset
+
+    def get_last_modified(self, theme_history):
+        return theme_history.created_at
+
+    @action(detail=True, methods=['get'], url_path=r'diff/(?P<other_pk>\d+)')
+    def diff(self, request, pk=None, other_pk=None):
+        base = self.get_object()
+        target = ThemeHistory.objects.select_related('organization').filter(pk=other_pk).first()
+        if target is None:
+            return Response({'error': 'Theme history entry not found'}, status=status.HTTP_404_NOT_FOUND)
+        if target.organization_id != base.organization_id:
+            return Response(
+                {'error': 'Both entries must belong to the same organization'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if not _query_flag(request, 'delta'):
+                return Response(diff_theme_history(base, target))
+            diff, content = build_delta_package(base, target)
+        except (KeyError, OSError, ValueError, zipfile.BadZipFile):
+            return Response(
+                {'error': 'Theme package file is missing or unreadable'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        filename = f"theme_{base.organization_id}_{diff['from']['version']}_to_{diff['to']['version']}.zip"
+        response = HttpResponse(content, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
-    return master_key
+def _parse_id(value):
+    # int() alone would also accept 1.5, True and ' 7 '.
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    raise ValueError(value)
+
+
+def _parse_date_bound(name, value):
+    # Returns (bound, is_whole_day). Well-formed but impossible values such as
+    # 2020-13-45 make the parsers raise ValueError rather than return None.
+    error = ValidationError({name: 'Use YYYY-MM-DD or an ISO 8601 datetime'})
+    try:
+        day = parse_date(value)
+    except ValueError:
+        raise error
+    if day is not None:
+        return timezone.make_aware(datetime.combine(day, datetime.min.time())), True
+
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        raise error
+    if parsed is None:
+        raise error
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, False
+
+
+def filter_theme_history(queryset, params):
+    # Date-only bounds are inclusive whole days; they are converted to
+    # timestamps so the (created_at, id) indexes stay usable.
+    created_after = params.get('created_after')
+    if created_after:
+        bound, is_whole_day = _parse_date_bound('created_after', created_after)
+        queryset = queryset.filter(created_at__gte=bound)
+
+    created_before = params.get('created_before')
+    if created_before:
+        bound, is_whole_day = _parse_date_bound('created_before', created_before)
+        if is_whole_day:
+            queryset = queryset.filter(created_at__lt=bound + timedelta(days=1))
+        else:
+            queryset = queryset.filter(created_at__lte=bound)
+
+    return queryset
 
 
 class DashboardViewSet(viewsets.ViewSet):
@@ -180,15 +383,7 @@ class DashboardViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        total_organizations = Organization.objects.count()
-        total_themes = ThemeHistory.objects.count()
-        active_themes = Organization.objects.filter(config_json__isnull=False).count()
-
-        return Response({
-            'total_organizations': total_organizations,
-            'total_themes': total_themes,
-            'active_themes': active_themes
-        })
+        return Response(get_dashboard_stats())
 
 
 class LicenseViewSet(viewsets.ModelViewSet):
@@ -201,72 +396,136 @@ class LicenseViewSet(viewsets.ModelViewSet):
         vm_ip = request.data.get('vm_ip')
         expiry_date = request.data.get('expiry_date')
 
-        if not vm_ip or not expiry_date:
+        try:
+            parse_license_request(vm_ip, expiry_date)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if _query_flag(request, 'async'):
+            job = enqueue_job(Job.KIND_LICENSE, {'vm_ip': vm_ip, 'expiry_date': expiry_date}, request.user)
+            return _job_accepted_response(request, job)
+
+        license_obj, content = build_license_package(vm_ip, expiry_date)
+
+        filename = license_package_filename(vm_ip, expiry_date)
+
+        response = HttpResponse(content, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        items = request.data.get('licenses')
+
+        if not isinstance(items, list) or not items:
             return Response(
-                {'error': 'vm_ip and expiry_date are required'},
+                {'error': 'licenses must be a non-empty list of {vm_ip, expiry_date} objects'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            expiry_date_obj = datetime.strptime(expiry_date, '%Y-%m-%d').date()
-        except ValueError:
+        if len(items) > settings.LICENSE_BATCH_MAX_SIZE:
             return Response(
-                {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                {'error': f'A batch may contain at most {settings.LICENSE_BATCH_MAX_SIZE} licenses'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        from cryptography.hazmat.primitives.asymmetric import padding
-        from cryptography.hazmat.primitives import hashes, serialization
-        from cryptography.hazmat.backends import default_backend
+        # Entries carry the parsed date in ISO form, so 2025-1-5 and
+        # 2025-01-05 are the same license. Distinct VMs whose member names in
+        # the zip would collide (1.2.3.4 and 1_2_3_4) are rejected too.
+        entries = []
+        errors = {}
+        seen = {}
+        member_names = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = 'Each entry must be an object with vm_ip and expiry_date'
+                continue
+            try:
+                expiry = parse_license_request(item.get('vm_ip'), item.get('expiry_date'))
+            except ValueError as e:
+                errors[index] = str(e)
+                continue
+            entry = (item['vm_ip'], expiry.isoformat())
+            if entry in seen:
+                errors[index] = f'Duplicate of entry {seen[entry]}'
+                continue
+            member_name = license_json_filename(*entry)
+            if member_name in member_names:
+                errors[index] = f'File name {member_name} collides with entry {member_names[member_name]}'
+                continue
+            seen[entry] = index
+            member_names[member_name] = index
+            entries.append(entry)
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        licenses, content = build_license_batch_package(entries)
+
+        response = HttpResponse(content, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="licenses_{len(licenses)}.zip"'
+        return response
 
-        master_key = get_or_create_master_key()
+    @action(detail=False, methods=['post'])
+    def verify(self, request):
+        licenses = request.data.get('licenses')
 
-        private_key = serialization.load_pem_private_key(
-            master_key.private_key_pem.encode(),
-            password=None,
-            backend=default_backend()
-        )
+        if not isinstance(licenses, list) or not licenses:
+            return Response(
+                {'error': 'licenses must be a non-empty list of license.json objects'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        payload = {
-            "vm_id": vm_ip,
-            "expiry": expiry_date
-        }
-
-        payload_string = json.dumps(payload, separators=(",", ":"))
-        signature = private_key.sign(
-            payload_string.encode(),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        signature_hex = signature.hex()
+        if len(licenses) > settings.LICENSE_BATCH_MAX_SIZE:
+            return Response(
+                {'error': f'A batch may contain at most {settings.LICENSE_BATCH_MAX_SIZE} licenses'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        license_key = hashlib.sha256(payload_string.encode()).hexdigest()
+        verifier = master_key_provider.get().verifier
+        results = verifier.verify_many(licenses, workers=settings.LICENSE_VERIFY_WORKERS)
 
-        license_obj = License.objects.create(
-            vm_ip=vm_ip,
-            expiry_date=expiry_date_obj,
-            license_key=license_key
-        )
+        return Response({
+            'total': len(results),
+            'valid': sum(1 for result in results if result['valid']),
+            'invalid': sum(1 for result in results if not result['valid']),
+            'results': results,
+        })
 
-        license_json = {
-            "vm_id": vm_ip,
-            "expiry": expiry_date,
-            "signature": signature_hex
-        }
 
-        public_key_pem = master_key.public_key_pem
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsSuperAdmin]
 
-        zip_buffer = BytesIO()
-        zip_file = zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED)
-        zip_file.writestr('license.json', json.dumps(license_json, indent=2))
-        zip_file.writestr('public_key.pem', public_key_pem)
-        zip_file.close()
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        job = self.get_object()
 
-        filename = f"license_{vm_ip.replace('.', '_')}_{expiry_date}.zip"
+        if job.status != Job.STATUS_SUCCEEDED or not job.result_file:
+            return Response(
+                {'error': f'Job result is not available (status: {job.status})'},
+                status=status.HTTP_409_CONFLICT
+            )
 
-        response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+        return serve_storage_file(
+            request,
+            job.result_file.storage,
+            job.result_file.name,
+            filename=(job.result or {}).get('filename') or os.path.basename(job.result_file.name),
+            content_type='application/zip'
+        )
+
+
+def _query_flag(request, name, default=False):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _job_accepted_response(request, job):
+    serializer = JobSerializer(job, context={'request': request})
+    response = Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    return response
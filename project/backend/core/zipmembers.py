@@ -0,0 +1,70 @@
+import os
+import zlib
+import zipfile
+from .cache import theme_package_cache
+from .executors import run_cpu
+from .storage import read_storage_file
+
+# Deflating these barely shrinks them, so they are stored as-is.
+ALREADY_COMPRESSED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.zip'}
+
+
+def member_compress_type(name):
+    if os.path.splitext(name)[1].lower() in ALREADY_COMPRESSED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def compress_member(content, compress_type):
+    # Returns (compress_type, crc, file_size, data) where data is exactly the
+    # bytes that follow the member's local header.
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+    else:
+        data = content
+    return compress_type, zlib.crc32(content), len(content), data
+
+
+def _member_key(compress_type, content_hash):
+    # Content-addressed, so never scoped or invalidated.
+    return f'member:{compress_type}:{content_hash}'
+
+
+def get_compressed_member(field_file, content_hash, compress_type):
+    if compress_type == zipfile.ZIP_STORED or not content_hash:
+        return run_cpu(compress_member, read_storage_file(field_file), compress_type)
+
+    return theme_package_cache.get_or_set(
+        _member_key(compress_type, content_hash),
+        lambda: run_cpu(compress_member, read_storage_file(field_file), compress_type)
+    )
+
+
+def get_cached_member(content_hash, compress_type):
+    if compress_type == zipfile.ZIP_STORED or not content_hash:
+        return None
+    return theme_package_cache.get(_member_key(compress_type, content_hash))
+
+
+def write_compressed_member(zip_file, zinfo, member):
+    # zipfile has no public API for adding an already-compressed member, so
+    # this mirrors what ZipFile.open(mode='w') does around the payload: write
+    # the local header at start_dir, append the raw data and register the
+    # entry for the central directory written on close().
+    compress_type, crc, file_size, data = member
+    zinfo.compress_type = compress_type
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(data)
+
+    with zip_file._lock:
+        zip_file._writecheck(zinfo)
+        if zip_file._seekable:
+            zip_file.fp.seek(zip_file.start_dir)
+        zinfo.header_offset = zip_file.fp.tell()
+        zip_file.fp.write(zinfo.FileHeader())
+        zip_file.fp.write(data)
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[zinfo.filename] = zinfo
+        zip_file.start_dir = zip_file.fp.tell()
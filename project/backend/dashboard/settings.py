@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -22,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,16 +54,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dashboard.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DATABASE_NAME', default='theme_manager_db'),
-        'USER': config('DATABASE_USER', default='postgres'),
-        'PASSWORD': config('DATABASE_PASSWORD', default='postgres'),
-        'HOST': config('DATABASE_HOST', default='db'),
-        'PORT': config('DATABASE_PORT', default='5432'),
+# 'postgresql' (default) or 'sqlite' for local benchmarks and experiments.
+DATABASE_ENGINE = config('DATABASE_ENGINE', default='postgresql')
+
+if DATABASE_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DATABASE_NAME', default='theme_manager_db'),
+            'USER': config('DATABASE_USER', default='postgres'),
+            'PASSWORD': config('DATABASE_PASSWORD', default='postgres'),
+            'HOST': config('DATABASE_HOST', default='db'),
+            'PORT': config('DATABASE_PORT', default='5432'),
+        }
     }
-}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -88,6 +101,43 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+SERVE_MEDIA = config('SERVE_MEDIA', default=DEBUG, cast=bool)
+
+# 'local' keeps uploads under MEDIA_ROOT; 's3' stores them in any S3-compatible
+# bucket (AWS, MinIO) through django-storages.
+STORAGE_BACKEND = config('STORAGE_BACKEND', default='local')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+if STORAGE_BACKEND == 's3':
+    STORAGES['default'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': config('AWS_STORAGE_BUCKET_NAME'),
+            'access_key': config('AWS_ACCESS_KEY_ID', default=None),
+            'secret_key': config('AWS_SECRET_ACCESS_KEY', default=None),
+            'region_name': config('AWS_S3_REGION_NAME', default=None),
+            'endpoint_url': config('AWS_S3_ENDPOINT_URL', default=None),
+            'custom_domain': config('AWS_S3_CUSTOM_DOMAIN', default=None),
+            'location': config('AWS_LOCATION', default=''),
+            'default_acl': None,
+            'file_overwrite': False,
+            'querystring_auth': True,
+            'querystring_expire': config('MEDIA_PRESIGNED_EXPIRY', default=3600, cast=int),
+        },
+    }
+
+# stream | redirect | x-accel | sendfile; see core/storage.py.
+MEDIA_DELIVERY = config('MEDIA_DELIVERY', default='stream')
+MEDIA_PRESIGNED_EXPIRY = config('MEDIA_PRESIGNED_EXPIRY', default=3600, cast=int)
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -95,7 +145,7 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedUserJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -118,10 +168,104 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.CustomTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.CustomTokenRefreshSerializer',
+}
+
+# Seconds a User row is reused to authenticate access tokens; role and
+# activation changes made in another process apply within this window.
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
+# Local tier: per-process memory. Shared tier: Redis when REDIS_URL is set,
+# so every worker and node sees the same entries (see core/cache.py).
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_KEY_PREFIX = config('CACHE_KEY_PREFIX', default='theme-manager')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'theme-manager',
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=5000, cast=int),
+        },
+    },
 }
 
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+    }
+
+# Seconds a worker trusts its memoized generation counters before asking the
+# shared tier again; the bound on cross-node staleness after an invalidation.
+CACHE_GENERATION_TTL = config('CACHE_GENERATION_TTL', default=5, cast=int)
+ORGANIZATION_CACHE_TTL = config('ORGANIZATION_CACHE_TTL', default=3600, cast=int)
+THEME_PACKAGE_CACHE_TTL = config('THEME_PACKAGE_CACHE_TTL', default=86400, cast=int)
+DASHBOARD_STATS_CACHE_TTL = config('DASHBOARD_STATS_CACHE_TTL', default=60, cast=int)
+MASTER_KEY_CACHE_TTL = config('MASTER_KEY_CACHE_TTL', default=300, cast=int)
+
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:5173').split(',')
 CORS_ALLOW_CREDENTIALS = True
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
+
+THEME_PACKAGE_STREAMING = config('THEME_PACKAGE_STREAMING', default=False, cast=bool)
+THEME_BULK_WORKERS = config('THEME_BULK_WORKERS', default=4, cast=int)
+THEME_RETENTION_KEEP_LAST = config('THEME_RETENTION_KEEP_LAST', default=10, cast=int)
+THEME_RETENTION_DAYS = config('THEME_RETENTION_DAYS', default=0, cast=int)
+MEDIA_ORPHAN_GRACE_HOURS = config('MEDIA_ORPHAN_GRACE_HOURS', default=24, cast=int)
+THEME_DELIVERY_LATEST_MAX_AGE = config('THEME_DELIVERY_LATEST_MAX_AGE', default=60, cast=int)
+LICENSE_SIGNING_WORKERS = config('LICENSE_SIGNING_WORKERS', default=4, cast=int)
+LICENSE_BATCH_PARALLEL_THRESHOLD = config('LICENSE_BATCH_PARALLEL_THRESHOLD', default=32, cast=int)
+LICENSE_BATCH_MAX_SIZE = config('LICENSE_BATCH_MAX_SIZE', default=1000, cast=int)
+LICENSE_VERIFY_WORKERS = config('LICENSE_VERIFY_WORKERS', default=4, cast=int)
+ASSET_OPTIMIZATION_ENABLED = config('ASSET_OPTIMIZATION_ENABLED', default=False, cast=bool)
+ASSET_OPTIMIZATION_MAX_INPUT_BYTES = config('ASSET_OPTIMIZATION_MAX_INPUT_BYTES', default=1048576, cast=int)
+ASSET_JPEG_QUALITY_MAX = config('ASSET_JPEG_QUALITY_MAX', default=90, cast=int)
+ASSET_JPEG_QUALITY_MIN = config('ASSET_JPEG_QUALITY_MIN', default=70, cast=int)
+ASSET_VARIANTS_ASYNC = config('ASSET_VARIANTS_ASYNC', default=True, cast=bool)
+ASSET_VARIANT_WORKERS = config('ASSET_VARIANT_WORKERS', default=2, cast=int)
+ASSET_BANNER_WIDTHS = [320, 640, 960]
+
+# Threads per process for CPU-bound zip and RSA work (core.executors).
+CPU_EXECUTOR_WORKERS = config('CPU_EXECUTOR_WORKERS', default=os.cpu_count() or 1, cast=int)
+
+METRICS_PATH = '/metrics'
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_FORMAT = config('LOG_FORMAT', default='text')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'text': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+        'json': {
+            '()': 'core.log.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': LOG_FORMAT,
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
@@ -1,12 +1,29 @@
+import re
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core import delivery
+from core.media import serve_media
+from core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('core.urls')),
+    path(settings.METRICS_PATH.lstrip('/'), metrics_view, name='metrics'),
+    path('themes/<int:organization_id>/config.json', delivery.latest_config, name='theme-delivery-latest'),
+    re_path(
+        r'^themes/(?P<organization_id>\d+)/(?P<version>[0-9a-f]{%d})/config\.json$' % delivery.VERSION_LENGTH,
+        delivery.versioned_config,
+        name='theme-delivery-config'
+    ),
+    re_path(
+        r'^themes/(?P<organization_id>\d+)/(?P<version>[0-9a-f]{%d})/assets/(?P<path>.+)$' % delivery.VERSION_LENGTH,
+        delivery.versioned_asset,
+        name='theme-delivery-asset'
+    ),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
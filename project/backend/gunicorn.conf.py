@@ -0,0 +1,25 @@
+import multiprocessing
+from decouple import config
+
+# Read by gunicorn from the working directory (docker-compose and the Dockerfile
+# just run "gunicorn"). SERVER_MODE picks the interface:
+#   asgi - uvicorn workers; async views stream files and theme config without
+#          holding a worker, so one process serves many slow downloads
+#   wsgi - classic synchronous workers, one request per worker thread
+SERVER_MODE = config('SERVER_MODE', default='asgi')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'dashboard.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    default_workers = multiprocessing.cpu_count()
+else:
+    wsgi_app = 'dashboard.wsgi:application'
+    worker_class = config('GUNICORN_WORKER_CLASS', default='sync')
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = config('WEB_CONCURRENCY', default=default_workers, cast=int)
+# Only used by the gthread worker class in WSGI mode.
+threads = config('GUNICORN_THREADS', default=1, cast=int)
+timeout = config('GUNICORN_TIMEOUT', default=120, cast=int)
+keepalive = config('GUNICORN_KEEPALIVE', default=5, cast=int)